@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark of the full process_new_pdfs flow.
+Runs the monitor against the local stand-in from benchmark_server.py and
+reports throughput, per-stage latency percentiles and peak memory.
+"""
+
+import argparse
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmark_server import StandInServer
+
+# Stages reported in the summary table, in pipeline order
+REPORTED_STAGES = ('crawl.fetch', 'crawl.parse', 'download', 'extract', 'summarize', 'gemini.request',
+                   'publish.telegram', 'publish.rss', 'publish.rss.batch', 'publish.facebook',
+                   'publish.facebook.batch')
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--listing-pages', type=int, default=5, help='number of monitored listing pages')
+    parser.add_argument('--documents-per-page', type=int, default=4, help='PDF links on every listing page')
+    parser.add_argument('--pdf-pages', type=int, default=10, help='pages of every generated PDF')
+    parser.add_argument('--page-latency', type=float, default=0.05, help='listing page latency in seconds')
+    parser.add_argument('--pdf-latency', type=float, default=0.05, help='PDF download latency in seconds')
+    parser.add_argument('--gemini-latency', type=float, default=0.5, help='Gemini response latency in seconds')
+    parser.add_argument('--telegram-latency', type=float, default=0.1, help='Telegram API latency in seconds')
+    parser.add_argument('--graph-latency', type=float, default=0.1, help='Graph API latency in seconds')
+    parser.add_argument('--output', help='write the JSON report to this file')
+    return parser.parse_args()
+
+
+def configure_environment(server: StandInServer, documents: int):
+    """Point the monitor at the stand-in, keeping any tuning variables already set"""
+    os.environ.update({
+        'URLS_TO_MONITOR': json.dumps(server.urls_to_monitor()),
+        'GEMINI_API_KEY': 'benchmark',
+        'GEMINI_MODEL_NAME': 'benchmark-model',
+        'GEMINI_PROMPT': 'Shrň dokument {title}:\n\n{text}',
+        'GEMINI_API_ENDPOINT': server.base_url,
+        'TELEGRAM_BOT_TOKEN': 'benchmark',
+        'TELEGRAM_CHAT_ID': 'benchmark',
+        'TELEGRAM_API_URL': server.base_url,
+        'FB_USER_TOKEN': 'benchmark',
+        'FB_PAGE_ID': 'bench-page',
+        'FB_GRAPH_URL': server.base_url,
+        'METRICS_REPORT_FILE': 'run_report.json',
+    })
+    os.environ.setdefault('MAX_DOCUMENTS_PER_RUN', str(documents))
+    os.environ.setdefault('GEMINI_RPM', '0')
+    os.environ.setdefault('TELEGRAM_MIN_INTERVAL', '0')
+
+
+def main():
+    args = parse_args()
+    server = StandInServer(
+        listing_pages=args.listing_pages,
+        documents_per_page=args.documents_per_page,
+        pdf_pages=args.pdf_pages,
+        page_latency=args.page_latency,
+        pdf_latency=args.pdf_latency,
+        gemini_latency=args.gemini_latency,
+        telegram_latency=args.telegram_latency,
+        graph_latency=args.graph_latency
+    ).start()
+    documents = args.listing_pages * args.documents_per_page
+    configure_environment(server, documents)
+
+    repo_dir = Path(__file__).resolve().parent
+    sys.path.insert(0, str(repo_dir))
+    output = Path(args.output).resolve() if args.output else None
+
+    with tempfile.TemporaryDirectory(prefix='summarizer-bench-') as work_dir:
+        os.chdir(work_dir)
+        from main import DecinPDFMonitor
+        from metrics import metrics
+
+        monitor = DecinPDFMonitor()
+        start = time.perf_counter()
+        monitor.process_new_pdfs()
+        wall_time = time.perf_counter() - start
+        processed = len(monitor.processed_pdfs)
+        run_report = metrics.report()
+        # Wait for the extraction and OCR workers so their memory shows up in RUSAGE_CHILDREN
+        if 'extractor' in monitor.__dict__:
+            monitor.extractor.close()
+        os.chdir(repo_dir)
+    server.stop()
+
+    report = {
+        'documents': processed,
+        'wall_time': wall_time,
+        'docs_per_sec': processed / wall_time if wall_time else 0.0,
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        # Largest single worker process, the workers run side by side so the total can be higher
+        'peak_child_rss_mb': resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024,
+        'requests': server.requests,
+        'stages': {name: {'p50': stats['p50'], 'p95': stats['p95'], 'count': stats['count']}
+                   for name, stats in run_report['timings'].items()},
+        'counters': run_report['counters']
+    }
+
+    print()
+    print(f"Documents: {processed} in {wall_time:.2f} s ({report['docs_per_sec']:.2f} docs/s), "
+          f"peak RSS {report['peak_rss_mb']:.1f} MB, largest worker {report['peak_child_rss_mb']:.1f} MB")
+    print(f"{'stage':<20}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}")
+    for name in REPORTED_STAGES:
+        if name in report['stages']:
+            stats = report['stages'][name]
+            print(f"{name:<20}{stats['count']:>8}{stats['p50'] * 1000:>10.1f}{stats['p95'] * 1000:>10.1f}")
+
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
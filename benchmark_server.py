@@ -0,0 +1,179 @@
+"""
+Local stand-in for mmdecin.cz, Gemini, Telegram and the Facebook Graph API.
+Serves synthetic listing pages and generated PDFs so the monitor can be
+benchmarked without network access.
+"""
+
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+from urllib.parse import parse_qs
+
+WORDS = ("rada mesta schvaluje usneseni rozpocet zastupitelstvo komise zapis dotace "
+         "smlouva najem pozemek investice rekonstrukce skola doprava parkoviste kultura "
+         "socialni vybor financni kontrolni osadni mesto Decin projekt zadost navrh").split()
+
+
+def _pdf_escape(text: str) -> str:
+    return text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+def generate_pdf(pages: int, lines_per_page: int = 40, seed: int = 0) -> bytes:
+    """Build a simple text PDF with the given number of pages"""
+    rng = random.Random(seed)
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>"]
+    kids = " ".join(f"{3 + 2 * i} 0 R" for i in range(pages))
+    objects.append(f"<< /Type /Pages /Kids [{kids}] /Count {pages} >>")
+    font_id = 3 + 2 * pages
+    for page in range(pages):
+        lines = [f"Usneseni c. {seed}/{page + 1}"] + [
+            " ".join(rng.choice(WORDS) for _ in range(12)) for _ in range(lines_per_page - 1)
+        ]
+        stream = "BT /F1 10 Tf 50 760 Td " + " ".join(
+            f"({_pdf_escape(line)}) Tj 0 -18 Td" for line in lines
+        ) + " ET"
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       f"/Contents {4 + 2 * page} 0 R /Resources << /Font << /F1 {font_id} 0 R >> >> >>")
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+    objects.append("<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    out = "%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n"
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n"
+    return out.encode('latin-1')
+
+
+class StandInServer:
+    """Threaded HTTP server emulating all external services of the monitor"""
+
+    def __init__(self, listing_pages: int = 5, documents_per_page: int = 4, pdf_pages: int = 10,
+                 page_latency: float = 0.05, pdf_latency: float = 0.05, gemini_latency: float = 0.5,
+                 telegram_latency: float = 0.1, graph_latency: float = 0.1):
+        self.listing_pages = listing_pages
+        self.documents_per_page = documents_per_page
+        self.pdf_pages = pdf_pages
+        self.latency = {
+            'page': page_latency,
+            'pdf': pdf_latency,
+            'gemini': gemini_latency,
+            'telegram': telegram_latency,
+            'graph': graph_latency
+        }
+        self.requests = {name: 0 for name in self.latency}
+        self._pdf_cache = {}
+        self._lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), self._handler_class())
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.httpd.server_port}"
+
+    def start(self) -> 'StandInServer':
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def urls_to_monitor(self) -> List[Dict[str, str]]:
+        return [{'url': f"{self.base_url}/list/{page}", 'title': f"Komise {page}"}
+                for page in range(self.listing_pages)]
+
+    def listing_html(self, page: int) -> bytes:
+        links = "".join(
+            f'<li><a href="/doc/{page}-{doc}/file">Zápis {doc} komise {page}</a></li>'
+            for doc in range(self.documents_per_page)
+        )
+        return f"<html><body><ul>{links}</ul></body></html>".encode('utf-8')
+
+    def pdf(self, document: str) -> bytes:
+        with self._lock:
+            if document not in self._pdf_cache:
+                seed = sum(int(part) * 1000 ** i for i, part in enumerate(document.split('-')))
+                self._pdf_cache[document] = generate_pdf(self.pdf_pages, seed=seed)
+            return self._pdf_cache[document]
+
+    def _count(self, name: str):
+        with self._lock:
+            self.requests[name] += 1
+        time.sleep(self.latency[name])
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, body: bytes, content_type: str = 'application/json', status: int = 200):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _json(self, data: dict, status: int = 200):
+                self._send(json.dumps(data).encode('utf-8'), status=status)
+
+            def _read_body(self) -> bytes:
+                return self.rfile.read(int(self.headers.get('Content-Length', 0)))
+
+            def do_GET(self):
+                path = self.path.split('?')[0]
+                if match := re.fullmatch(r'/list/(\d+)', path):
+                    server._count('page')
+                    self._send(server.listing_html(int(match.group(1))), 'text/html; charset=utf-8')
+                elif match := re.fullmatch(r'/doc/([\d-]+)/file', path):
+                    server._count('pdf')
+                    self._send(server.pdf(match.group(1)), 'application/pdf')
+                elif path.endswith('/me/accounts'):
+                    server._count('graph')
+                    self._json({'data': [{'id': 'bench-page', 'access_token': 'bench-page-token'}]})
+                else:
+                    self._json({'error': 'not found'}, status=404)
+
+            def do_POST(self):
+                path = self.path.split('?')[0]
+                body = self._read_body()
+                if path.endswith(':generateContent'):
+                    server._count('gemini')
+                    prompt_tokens = len(body) // 4
+                    self._json({
+                        'candidates': [{
+                            'content': {'parts': [{'text': 'Syntetický souhrn dokumentu.'}], 'role': 'model'},
+                            'finishReason': 'STOP',
+                            'index': 0
+                        }],
+                        'usageMetadata': {'promptTokenCount': prompt_tokens, 'candidatesTokenCount': 8,
+                                          'totalTokenCount': prompt_tokens + 8}
+                    })
+                elif re.fullmatch(r'/bot[^/]+/sendMessage', path):
+                    server._count('telegram')
+                    self._json({'ok': True, 'result': {'message_id': server.requests['telegram']}})
+                elif path == '/':
+                    # Graph API batch endpoint
+                    server._count('graph')
+                    calls = json.loads(parse_qs(body.decode('utf-8'))['batch'][0])
+                    self._json([{'code': 200, 'body': json.dumps({'id': f"bench-page_{index}"})}
+                                for index in range(len(calls))])
+                elif path.endswith('/feed'):
+                    server._count('graph')
+                    self._json({'id': f"bench-page_{server.requests['graph']}"})
+                else:
+                    self._json({'error': 'not found'}, status=404)
+
+        return Handler
@@ -12,5 +12,108 @@ class AppConfig:
         self.gemini_api_key = os.getenv('GEMINI_API_KEY')
         self.gemini_model_name = os.getenv('GEMINI_MODEL_NAME')
         self.gemini_prompt = os.getenv('GEMINI_PROMPT')
+        # API base URLs, overridable to point the tool at local stand-ins
+        self.gemini_api_endpoint = os.getenv('GEMINI_API_ENDPOINT')
+        self.telegram_api_url = os.getenv('TELEGRAM_API_URL', 'https://api.telegram.org')
+        self.fb_graph_url = os.getenv('FB_GRAPH_URL', 'https://graph.facebook.com/v23.0')
         urls_json = os.getenv('URLS_TO_MONITOR')
         self.urls_to_monitor = json.loads(urls_json) if urls_json else []
+
+        # Crawling of monitored pages
+        self.crawl_max_workers = int(os.getenv('CRAWL_MAX_WORKERS', '8'))
+        self.crawl_per_host_limit = int(os.getenv('CRAWL_PER_HOST_LIMIT', '4'))
+        self.crawl_request_interval = float(os.getenv('CRAWL_REQUEST_INTERVAL', '0.25'))
+        # Listing pages followed per monitored source, overridden by its 'max_pages'
+        self.listing_max_pages = int(os.getenv('LISTING_MAX_PAGES', '1'))
+
+        # PDFs up to this size are kept in memory, larger ones spill to a temp file
+        self.pdf_spool_max_bytes = int(os.getenv('PDF_SPOOL_MAX_BYTES', str(16 * 1024 * 1024)))
+
+        # Document pipeline
+        self.max_documents_per_run = int(os.getenv('MAX_DOCUMENTS_PER_RUN', '10'))
+        self.pipeline_download_workers = int(os.getenv('PIPELINE_DOWNLOAD_WORKERS', '4'))
+        self.pipeline_extract_workers = int(os.getenv('PIPELINE_EXTRACT_WORKERS', '2'))
+        self.pipeline_summary_workers = int(os.getenv('PIPELINE_SUMMARY_WORKERS', '4'))
+
+        # Gemini request scheduling, budgets of 0 are unlimited
+        self.gemini_rpm = int(os.getenv('GEMINI_RPM', '15'))
+        self.gemini_tpm = int(os.getenv('GEMINI_TPM', '1000000'))
+        self.gemini_concurrency = int(os.getenv('GEMINI_CONCURRENCY', '4'))
+        self.gemini_max_retries = int(os.getenv('GEMINI_MAX_RETRIES', '4'))
+        self.gemini_retry_backoff = float(os.getenv('GEMINI_RETRY_BACKOFF', '5'))
+
+        # Cache of generated summaries
+        self.summary_cache_max_entries = int(os.getenv('SUMMARY_CACHE_MAX_ENTRIES', '500'))
+        self.summary_cache_max_age_days = int(os.getenv('SUMMARY_CACHE_MAX_AGE_DAYS', '365'))
+
+        # Number of newest items kept in the published RSS feed
+        self.rss_max_items = int(os.getenv('RSS_MAX_ITEMS', '50'))
+
+        # Chunked summarization of long documents
+        self.gemini_chunk_threshold_tokens = int(os.getenv('GEMINI_CHUNK_THRESHOLD_TOKENS', '60000'))
+        self.gemini_chunk_tokens = int(os.getenv('GEMINI_CHUNK_TOKENS', '20000'))
+        self.gemini_chunk_concurrency = int(os.getenv('GEMINI_CHUNK_CONCURRENCY', '3'))
+        self.gemini_chunk_prompt = os.getenv(
+            'GEMINI_CHUNK_PROMPT',
+            "Toto je část {part} z {parts} dokumentu '{title}'. Stručně shrň její obsah, "
+            "zachovej všechna usnesení, částky, termíny a jména.\n\n{text}"
+        )
+        self.gemini_reduce_prompt = os.getenv('GEMINI_REDUCE_PROMPT') or self.gemini_prompt
+
+        # Publishing to Telegram, Facebook and RSS
+        self.publish_sink_timeout = float(os.getenv('PUBLISH_SINK_TIMEOUT', '300'))
+        self.publish_max_retries = int(os.getenv('PUBLISH_MAX_RETRIES', '3'))
+        self.publish_retry_backoff = float(os.getenv('PUBLISH_RETRY_BACKOFF', '2'))
+
+        # Runs after which an undeliverable outbox entry is given up
+        self.outbox_max_attempts = int(os.getenv('OUTBOX_MAX_ATTEMPTS', '5'))
+
+        # Run report with per-stage timings and counters
+        self.metrics_report_file = os.getenv('METRICS_REPORT_FILE', 'run_report.json')
+        self.metrics_prometheus_file = os.getenv('METRICS_PROMETHEUS_FILE')
+
+        # PDF text extraction
+        self.pdf_extractor = os.getenv('PDF_EXTRACTOR', 'auto')
+        self.pdf_extract_processes = int(os.getenv('PDF_EXTRACT_PROCESSES', '0'))
+        self.pdf_parallel_min_pages = int(os.getenv('PDF_PARALLEL_MIN_PAGES', '24'))
+        self.extraction_cache_dir = os.getenv('EXTRACTION_CACHE_DIR', 'extraction_cache')
+
+        # OCR of PDF pages without a text layer (needs Tesseract and pytesseract)
+        self.ocr_enabled = os.getenv('OCR_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+        self.ocr_language = os.getenv('OCR_LANGUAGE', 'ces')
+        self.ocr_min_chars = int(os.getenv('OCR_MIN_CHARS', '20'))
+        self.ocr_render_scale = float(os.getenv('OCR_RENDER_SCALE', '4'))
+        self.ocr_processes = int(os.getenv('OCR_PROCESSES', '0'))
+
+        # Detection of duplicate and revised documents
+        self.dedup_enabled = os.getenv('DEDUP_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+        self.dedup_similarity_threshold = float(os.getenv('DEDUP_SIMILARITY_THRESHOLD', '0.8'))
+        self.dedup_text_retention_days = int(os.getenv('DEDUP_TEXT_RETENTION_DAYS', '365'))
+        self.gemini_diff_prompt = os.getenv(
+            'GEMINI_DIFF_PROMPT',
+            "Dokument '{title}' je nová verze dříve zveřejněného dokumentu. Souhrn předchozí verze:\n\n"
+            "{previous_summary}\n\nPřidané řádky:\n{added}\n\nOdebrané řádky:\n{removed}\n\n"
+            "Stručně popiš, co se v nové verzi změnilo."
+        )
+
+        # Polling intervals of the watch mode in seconds
+        self.watch_min_interval = float(os.getenv('WATCH_MIN_INTERVAL', '900'))
+        self.watch_max_interval = float(os.getenv('WATCH_MAX_INTERVAL', '604800'))
+        self.watch_hot_interval = float(os.getenv('WATCH_HOT_INTERVAL', '1800'))
+        self.watch_backoff = float(os.getenv('WATCH_BACKOFF', '2'))
+        # Polls per day shared by all sources, 0 for one sweep over every source
+        self.watch_daily_polls = int(os.getenv('WATCH_DAILY_POLLS', '0'))
+
+        # Spacing of messages to one Telegram chat, channels allow about 20 per minute
+        self.telegram_min_interval = float(os.getenv('TELEGRAM_MIN_INTERVAL', '3'))
+
+        # Facebook Graph API client
+        self.fb_timeout = float(os.getenv('FB_TIMEOUT', '30'))
+        self.fb_token_refresh_days = int(os.getenv('FB_TOKEN_REFRESH_DAYS', '7'))
+        # GitHub token allowed to update repository secrets, used to save an exchanged user token
+        self.github_secrets_token = os.getenv('GITHUB_SECRETS_TOKEN')
+
+    def summary_prompt_fingerprint(self) -> str:
+        """All prompts that influence a generated summary"""
+        return "\0".join(prompt or '' for prompt in
+                         (self.gemini_prompt, self.gemini_chunk_prompt, self.gemini_reduce_prompt))
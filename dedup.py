@@ -0,0 +1,130 @@
+import difflib
+import hashlib
+import random
+import re
+import threading
+import zlib
+from array import array
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from config import AppConfig
+from metrics import metrics
+from processed_store import ProcessedDocumentStore
+
+# MinHash with 64 permutations split into 16 LSH bands of 4 rows
+NUM_PERMUTATIONS = 64
+BAND_ROWS = 4
+SHINGLE_WORDS = 5
+MERSENNE_PRIME = (1 << 61) - 1
+
+_rng = random.Random(20240901)
+PERMUTATIONS = [(_rng.randrange(1, MERSENNE_PRIME), _rng.randrange(0, MERSENNE_PRIME))
+                for _ in range(NUM_PERMUTATIONS)]
+
+WORD_PATTERN = re.compile(r'\w+')
+
+
+def shingles(text: str) -> List[int]:
+    """Hashes of overlapping word n-grams of the normalized text"""
+    words = WORD_PATTERN.findall(text.lower())
+    if len(words) <= SHINGLE_WORDS:
+        return [zlib.crc32(" ".join(words).encode('utf-8'))] if words else []
+    return list({zlib.crc32(" ".join(words[i:i + SHINGLE_WORDS]).encode('utf-8'))
+                 for i in range(len(words) - SHINGLE_WORDS + 1)})
+
+
+def minhash_signature(text: str) -> List[int]:
+    values = shingles(text)
+    if not values:
+        return [MERSENNE_PRIME] * NUM_PERMUTATIONS
+    return [min((a * x + b) % MERSENNE_PRIME for x in values) for a, b in PERMUTATIONS]
+
+
+def band_buckets(signature: List[int]) -> List[int]:
+    """One bucket per LSH band, documents sharing a bucket are similarity candidates"""
+    buckets = []
+    for start in range(0, len(signature), BAND_ROWS):
+        band = array('Q', signature[start:start + BAND_ROWS]).tobytes()
+        buckets.append(int.from_bytes(hashlib.blake2b(band, digest_size=8).digest(), 'big', signed=True))
+    return buckets
+
+
+def estimate_similarity(first: List[int], second: List[int]) -> float:
+    """Estimated Jaccard similarity of the shingle sets of two documents"""
+    return sum(1 for a, b in zip(first, second) if a == b) / len(first)
+
+
+def changed_lines(previous: str, current: str) -> Tuple[List[str], List[str]]:
+    """Lines added to and removed from the previous version of a text"""
+    previous_lines = [line.strip() for line in previous.splitlines() if line.strip()]
+    current_lines = [line.strip() for line in current.splitlines() if line.strip()]
+    added, removed = [], []
+    for line in difflib.unified_diff(previous_lines, current_lines, lineterm='', n=0):
+        if line.startswith(('+++', '---', '@@')):
+            continue
+        if line.startswith('+'):
+            added.append(line[1:])
+        elif line.startswith('-'):
+            removed.append(line[1:])
+    return added, removed
+
+
+class DedupIndex:
+    """Finds earlier documents with the same or nearly the same text.
+
+    Exact copies are matched by content hash, near-duplicates by MinHash
+    signatures looked up through LSH band buckets stored in the document
+    store. Texts are kept compressed for DEDUP_TEXT_RETENTION_DAYS so a new
+    revision can be summarized as a diff against its previous version.
+    """
+
+    def __init__(self, store: ProcessedDocumentStore, config: Optional[AppConfig] = None):
+        config = config or AppConfig()
+        self.store = store
+        self.threshold = config.dedup_similarity_threshold
+        self.text_retention_days = config.dedup_text_retention_days
+        # Serializes lookup and registration so documents of one run see each other
+        self._lock = threading.Lock()
+
+    def match_and_add(self, url: str, text: str, content_hash: str) -> Optional[Dict]:
+        """Index a document and return its best earlier match, or None.
+
+        The match has the keys 'url', 'similarity', 'exact' and 'previous_text'
+        (None when the earlier text is no longer stored).
+        """
+        signature = minhash_signature(text)
+        buckets = band_buckets(signature)
+        with self._lock:
+            match = self._find_match(url, content_hash, signature, buckets)
+            self.store.add_signature(url, content_hash, array('Q', signature).tobytes(), buckets,
+                                     zlib.compress(text.encode('utf-8')))
+        if match is not None:
+            metrics.incr('dedup.exact' if match['exact'] else 'dedup.near')
+            stored = self.store.signature_text(match['url'])
+            match['previous_text'] = zlib.decompress(stored).decode('utf-8') if stored else None
+        return match
+
+    def _find_match(self, url: str, content_hash: str, signature: List[int],
+                    buckets: List[int]) -> Optional[Dict]:
+        earlier = [doc['url'] for doc in self.store.find_by_content_hash(content_hash)]
+        earlier += self.store.find_signatures_by_hash(content_hash)
+        earlier = [other for other in earlier if other != url]
+        if earlier:
+            return {'url': earlier[0], 'similarity': 1.0, 'exact': True}
+
+        best = None
+        for other, blob in self.store.signature_candidates(buckets).items():
+            if other == url:
+                continue
+            similarity = estimate_similarity(signature, array('Q', blob).tolist())
+            if similarity >= self.threshold and (best is None or similarity > best['similarity']):
+                best = {'url': other, 'similarity': similarity, 'exact': False}
+        return best
+
+    def prune(self):
+        """Forget stored texts past the retention period"""
+        cutoff = (datetime.now() - timedelta(days=self.text_retention_days)).isoformat()
+        pruned = self.store.prune_signature_texts(cutoff)
+        if pruned:
+            print(f"Dropped stored texts of {pruned} documents from the dedup index")
@@ -0,0 +1,109 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import BinaryIO, Callable, Dict, List, Optional
+
+from config import AppConfig
+
+
+class DocumentPipeline:
+    """Bounded pipeline moving documents through download, extraction and
+    summarization stages, each running in its own worker pool.
+
+    Every summarized document is handed to `record` as soon as it is
+    finished, so its summary is persisted before anything gets published.
+    """
+
+    def __init__(self,
+                 download: Callable[[str], BinaryIO],
+                 extract: Callable[[BinaryIO], str],
+                 summarize: Callable[[Dict[str, str], str], str],
+                 record: Callable[[Dict[str, str]], None],
+                 config: Optional[AppConfig] = None):
+        config = config or AppConfig()
+        self.download = download
+        self.extract = extract
+        self.summarize = summarize
+        self.record = record
+        self.download_workers = config.pipeline_download_workers
+        self.extract_workers = config.pipeline_extract_workers
+        self.summary_workers = config.pipeline_summary_workers
+        self.max_documents = config.max_documents_per_run
+
+    def run(self, documents: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        """Process and record up to `max_documents_per_run` documents.
+
+        Returns the documents that were summarized and recorded.
+        """
+        if len(documents) > self.max_documents:
+            print(f"Document budget is {self.max_documents}, "
+                  f"deferring {len(documents) - self.max_documents} documents to the next run")
+            documents = documents[:self.max_documents]
+        if not documents:
+            return []
+
+        # Limit how many downloaded PDFs wait in memory for extraction
+        in_flight = threading.BoundedSemaphore(self.download_workers + self.extract_workers)
+
+        with ThreadPoolExecutor(self.download_workers, thread_name_prefix='download') as downloads, \
+                ThreadPoolExecutor(self.extract_workers, thread_name_prefix='extract') as extractions, \
+                ThreadPoolExecutor(self.summary_workers, thread_name_prefix='summarize') as summaries:
+            results = []
+            for pdf_info in documents:
+                in_flight.acquire()
+                downloaded = downloads.submit(self._download_stage, pdf_info)
+                extracted = self._then(downloaded, extractions, self._extract_stage)
+                extracted.add_done_callback(lambda _: in_flight.release())
+                results.append(self._then(extracted, summaries,
+                                          lambda text, pdf_info=pdf_info: self._summary_stage(pdf_info, text)))
+            wait(results)
+
+        finished = []
+        for pdf_info, result in zip(documents, results):
+            if result.exception() is not None:
+                print(f"Error processing PDF {pdf_info['url']}: {result.exception()}")
+                continue
+            finished.append(pdf_info)
+        return finished
+
+    def _then(self, future: Future, executor: ThreadPoolExecutor, fn: Callable) -> Future:
+        """Submit fn(result) to executor once future completes successfully"""
+        chained = Future()
+
+        def forward(done: Future):
+            if done.exception() is not None:
+                chained.set_exception(done.exception())
+                return
+            inner = executor.submit(fn, done.result())
+            inner.add_done_callback(lambda f: chained.set_exception(f.exception())
+                                    if f.exception() is not None else chained.set_result(f.result()))
+
+        future.add_done_callback(forward)
+        return chained
+
+    def _download_stage(self, pdf_info: Dict[str, str]) -> Optional[BinaryIO]:
+        print(f"Processing: {pdf_info['title']} - {pdf_info['url']}")
+        try:
+            return self.download(pdf_info['url'])
+        except Exception as e:
+            print(f"Error downloading PDF {pdf_info['url']}: {e}")
+            return None
+
+    def _extract_stage(self, pdf_file: Optional[BinaryIO]) -> str:
+        if pdf_file is None:
+            return ""
+        try:
+            with pdf_file:
+                return self.extract(pdf_file)
+        except Exception as e:
+            print(f"Error extracting text from PDF: {e}")
+            return ""
+
+    def _summary_stage(self, pdf_info: Dict[str, str], text: str) -> Dict[str, str]:
+        if not text:
+            print(f"Could not extract text from {pdf_info['url']}")
+            pdf_info['summary'] = "Byl přidán nový dokument, nepodařilo se ale získat text z dokumentu. "
+        else:
+            pdf_info['summary'] = self.summarize(pdf_info, text)
+        self.record(pdf_info)
+        return pdf_info
+
@@ -1,64 +1,63 @@
-from logging import config
-import os
-import requests
-import json
-from datetime import datetime, timedelta
+from typing import List, Optional
+from urllib.parse import urlencode
 
 from config import AppConfig
+from graph_client import INVALID_TOKEN_ERROR_CODE, GraphApiError, GraphClient
+
 
 class FacebookNotifier:
-    def __init__(self):
-        config = AppConfig()
+    def __init__(self, config: Optional[AppConfig] = None):
+        config = config or AppConfig()
         self.APP_ID = config.fb_app_id
         self.APP_SECRET = config.fb_app_secret
-        self.USER_TOKEN = config.fb_user_token  
+        self.USER_TOKEN = config.fb_user_token
         self.PAGE_ID = config.fb_page_id
-
-
+        self.graph = GraphClient(config)
 
     def get_page_access_token(self, user_token, page_id):
         """
         Fetch long-lived Page access token from user token.
         """
-        url = "https://graph.facebook.com/v23.0/me/accounts"
-        try:
-            resp = requests.get(url, params={"access_token": user_token})
-            resp.raise_for_status()
-            data = resp.json()
-        except requests.RequestException as e:
-            print(f"Error fetching page access token: {e}")
-            print(f"Response content: {getattr(resp, 'text', None)}")
-            print(f"User token: {user_token}")
-            raise
-        resp = requests.get(url, params={"access_token": user_token})
-        resp.raise_for_status()
-        data = resp.json()
-        for page in data.get("data", []):
-            if page["id"] == page_id:
-                return page["access_token"]
-        raise ValueError("Page ID not found or token invalid")
+        return self.graph.get_page_access_token(user_token, page_id)
 
     def post_to_page(self, page_token, page_id, message):
         """
         Post a message to the Facebook page.
         """
-        url = f"https://graph.facebook.com/v23.0/{page_id}/feed"
-        payload = {
+        return self.graph.request('POST', f"{page_id}/feed", data={
             "message": message,
             "access_token": page_token
-        }
-        resp = requests.post(url, data=payload)
-        resp.raise_for_status()
-        return resp.json()
-    def create_posts(self, posts):
-        """Send a notification message to the configured Facebook page.
-        """
-        page_token = self.get_page_access_token(self.USER_TOKEN, self.PAGE_ID)
+        })
 
-        for post in posts:
-            message = (
-                f"{post['source_title']}\n"
-                f"{post['summary']}"
-                f"Odkaz na dokument: {post['url']}\n"
-            )
-            self.post_to_page(page_token, self.PAGE_ID, message)
+    def format_message(self, post):
+        return (
+            f"{post['source_title']}\n"
+            f"{post['summary']}"
+            f"Odkaz na dokument: {post['url']}\n"
+        )
+
+    def create_post(self, post):
+        """Post one document to the page using the cached page token"""
+        try:
+            self.post_to_page(self.graph.page_token(self.PAGE_ID), self.PAGE_ID, self.format_message(post))
+        except GraphApiError as e:
+            if e.code != INVALID_TOKEN_ERROR_CODE:
+                raise
+            self.graph.invalidate(self.PAGE_ID)
+            self.post_to_page(self.graph.page_token(self.PAGE_ID), self.PAGE_ID, self.format_message(post))
+
+    def create_posts(self, posts) -> List[Optional[Exception]]:
+        """Post documents to the page in batched Graph API calls.
+
+        Returns None for every published post, or the error it failed with.
+        """
+        calls = [{
+            'method': 'POST',
+            'relative_url': f"{self.PAGE_ID}/feed",
+            'body': urlencode({'message': self.format_message(post)})
+        } for post in posts]
+        results = self.graph.batch(calls, self.graph.page_token(self.PAGE_ID))
+        errors = [result if isinstance(result, Exception) else None for result in results]
+        if any(isinstance(error, GraphApiError) and error.code == INVALID_TOKEN_ERROR_CODE for error in errors):
+            self.graph.invalidate(self.PAGE_ID)
+        return errors
@@ -0,0 +1,152 @@
+import json
+import threading
+import time
+from typing import Dict, List, Optional, Tuple, Union
+
+from config import AppConfig
+from http_client import create_session
+from publisher import RateLimitedError
+
+# Graph API error codes signalling application, user or page rate limits
+RATE_LIMIT_ERROR_CODES = {4, 17, 32, 613}
+# Error code of an expired or revoked access token
+INVALID_TOKEN_ERROR_CODE = 190
+# Maximum number of requests in one batch call
+BATCH_LIMIT = 50
+# Lifetime assumed for a page token whose expiry cannot be checked without app credentials
+UNVERIFIED_TOKEN_TTL = 24 * 3600
+
+
+class GraphApiError(Exception):
+    """Error response of the Graph API"""
+
+    def __init__(self, message: str, code: Optional[int] = None):
+        super().__init__(message)
+        self.code = code
+
+
+def raise_for_graph_error(status_code: int, body: Union[dict, list, None], headers: Dict[str, str]):
+    """Raise RateLimitedError for throttled calls and GraphApiError for other failures"""
+    error = body.get("error", {}) if isinstance(body, dict) else {}
+    code = error.get("code")
+    if status_code == 429 or code in RATE_LIMIT_ERROR_CODES:
+        retry_after = str(headers.get("Retry-After", ""))
+        raise RateLimitedError("Graph API rate limit reached",
+                               float(retry_after) if retry_after.isdigit() else 60)
+    if status_code >= 400 or error:
+        raise GraphApiError(error.get("message") or f"Graph API returned HTTP {status_code}", code)
+
+
+class GraphClient:
+    """Facebook Graph API client over a pooled session with timeouts.
+
+    Page access tokens are kept in memory only, so they are fetched once per
+    process and never written to disk. When app credentials are configured, a
+    user token close to expiring is exchanged for a new long-lived one through
+    refresh_fb_token.
+    """
+
+    def __init__(self, config: Optional[AppConfig] = None):
+        config = config or AppConfig()
+        self.graph_url = config.fb_graph_url.rstrip('/')
+        self.app_id = config.fb_app_id
+        self.app_secret = config.fb_app_secret
+        self.user_token = config.fb_user_token
+        self.timeout = config.fb_timeout
+        self.refresh_days = config.fb_token_refresh_days
+        self.github_secrets_token = config.github_secrets_token
+        self.session = create_session(pool_size=2)
+        self._lock = threading.Lock()
+        self._tokens = {}
+
+    def request(self, method: str, path: str = '', **kwargs) -> Union[dict, list]:
+        """Call a Graph API path and return the decoded response"""
+        kwargs.setdefault('timeout', self.timeout)
+        url = f"{self.graph_url}/{path.lstrip('/')}" if path else self.graph_url
+        resp = self.session.request(method, url, **kwargs)
+        try:
+            body = resp.json()
+        except ValueError:
+            body = None
+        raise_for_graph_error(resp.status_code, body, resp.headers)
+        return body
+
+    def batch(self, calls: List[Dict[str, str]], access_token: str) -> List[Union[dict, Exception]]:
+        """Run calls through the batch endpoint, BATCH_LIMIT per round trip.
+
+        Returns the decoded body of every call, or the exception it failed with.
+        """
+        results = []
+        for start in range(0, len(calls), BATCH_LIMIT):
+            chunk = calls[start:start + BATCH_LIMIT]
+            responses = self.request('POST', data={'access_token': access_token, 'batch': json.dumps(chunk),
+                                                   'include_headers': 'false'})
+            for response in responses + [None] * (len(chunk) - len(responses)):
+                if response is None:
+                    results.append(GraphApiError("No response to batched call"))
+                    continue
+                try:
+                    body = json.loads(response.get('body') or 'null')
+                    raise_for_graph_error(response.get('code', 500), body, {})
+                    results.append(body)
+                except Exception as e:
+                    results.append(e)
+        return results
+
+    def page_token(self, page_id: str) -> str:
+        """Return a valid access token of a page, from memory when possible"""
+        with self._lock:
+            entry = self._tokens.get(page_id)
+            if entry and (not entry['expires_at'] or entry['expires_at'] > time.time() + 60):
+                return entry['token']
+
+            user_token, expires_at = self._fresh_user_token()
+            # A page token lives as long as the user token it was derived from
+            self._tokens[page_id] = {
+                'token': self.get_page_access_token(user_token, page_id),
+                'expires_at': expires_at
+            }
+            return self._tokens[page_id]['token']
+
+    def invalidate(self, page_id: str):
+        """Forget a page token, e.g. after the API rejected it"""
+        with self._lock:
+            self._tokens.pop(page_id, None)
+
+    def get_page_access_token(self, user_token: str, page_id: str) -> str:
+        """Fetch the long-lived page access token from a user token"""
+        data = self.request('GET', 'me/accounts', params={"access_token": user_token})
+        for page in data.get("data", []):
+            if page["id"] == page_id:
+                return page["access_token"]
+        raise ValueError("Page ID not found or token invalid")
+
+    def debug_token(self, token: str) -> dict:
+        data = self.request('GET', 'debug_token', params={
+            'input_token': token,
+            'access_token': f"{self.app_id}|{self.app_secret}"
+        })
+        return data.get('data', {})
+
+    def _fresh_user_token(self) -> Tuple[str, float]:
+        """Return the user token and its expiry, exchanging it first when it is about to expire.
+
+        An exchanged token is saved to the FB_USER_TOKEN repository secret when
+        a GitHub token allowed to update secrets is configured.
+        """
+        if not (self.app_id and self.app_secret):
+            return self.user_token, time.time() + UNVERIFIED_TOKEN_TTL
+        expires_at = self.debug_token(self.user_token).get('expires_at') or 0
+        if expires_at and expires_at - time.time() < self.refresh_days * 86400:
+            from refresh_fb_token import GITHUB_REPO, SECRET_NAME, refresh_fb_token, update_github_secret
+            self.user_token = refresh_fb_token(self.app_id, self.app_secret, self.user_token,
+                                               graph_url=self.graph_url)
+            expires_at = self.debug_token(self.user_token).get('expires_at') or 0
+            if self.github_secrets_token:
+                try:
+                    update_github_secret(GITHUB_REPO, SECRET_NAME, self.user_token, self.github_secrets_token)
+                except Exception as e:
+                    print(f"Error saving the exchanged Facebook user token: {e}")
+            else:
+                print("Facebook user token exchanged, run refresh_fb_token.py to update the FB_USER_TOKEN secret")
+        return self.user_token, float(expires_at)
@@ -0,0 +1,107 @@
+import hashlib
+import json
+import re
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+
+import lxml.html
+from lxml import etree
+
+# Document links of mmdecin.cz end with '/file', matched case-insensitively like before
+DEFAULT_LINK_XPATH = ("//a[substring(translate(@href, 'FILE', 'file'), "
+                      "string-length(@href) - string-length('/file') + 1) = '/file']")
+# Standard rel="next" pagination links
+DEFAULT_NEXT_XPATH = "//a[@rel='next'] | //link[@rel='next']"
+
+CHARSET_PATTERN = re.compile(r'charset=["\']?([\w.:-]+)', re.IGNORECASE)
+
+
+def compile_selector(css: Optional[str] = None, xpath: Optional[str] = None,
+                     default: Optional[str] = None) -> Optional[etree.XPath]:
+    """Compile a CSS selector or an XPath expression into a reusable XPath"""
+    if css:
+        try:
+            from lxml.cssselect import CSSSelector
+        except ImportError:
+            raise ValueError(f"CSS selector '{css}' needs the cssselect package, use an XPath instead")
+        return CSSSelector(css)
+    expression = xpath or default
+    if not expression:
+        return None
+    try:
+        return etree.XPath(expression)
+    except etree.XPathSyntaxError as e:
+        raise ValueError(f"Invalid XPath '{expression}': {e}")
+
+
+def parse_html(content: bytes, content_type: str = ''):
+    """Parse a page with lxml, using the declared charset or UTF-8 when the bytes are valid UTF-8"""
+    match = CHARSET_PATTERN.search(content_type or '')
+    encoding = match.group(1) if match else None
+    if encoding is None:
+        try:
+            content.decode('utf-8')
+            encoding = 'utf-8'
+        except UnicodeDecodeError:
+            pass
+    parser = lxml.html.HTMLParser(encoding=encoding)
+    return lxml.html.document_fromstring(content, parser=parser)
+
+
+def absolute_url(page_url: str, origin: str, href: str) -> str:
+    """urljoin with a fast path for the common absolute and root-relative links"""
+    if href.startswith(('http://', 'https://')):
+        return href
+    if href.startswith('/') and not href.startswith('//') and '/.' not in href:
+        return origin + href
+    return urljoin(page_url, href)
+
+
+class LinkExtractor:
+    """Finds document links and the next listing page of one monitored source.
+
+    A source in URLS_TO_MONITOR can override the defaults with 'selector' (CSS)
+    or 'xpath' for document links, 'next_selector' or 'next_xpath' for the link
+    to the next page and 'max_pages' for how many listing pages are followed.
+    """
+
+    def __init__(self, source: Dict, max_pages: int = 1):
+        # Identifies the selectors, links cached for a page are only valid for the same ones
+        self.fingerprint = hashlib.sha256(json.dumps(
+            [source.get(key) for key in ('selector', 'xpath', 'next_selector', 'next_xpath')]
+            + [DEFAULT_LINK_XPATH, DEFAULT_NEXT_XPATH]
+        ).encode('utf-8')).hexdigest()[:16]
+        self.link_selector = compile_selector(source.get('selector'), source.get('xpath'), DEFAULT_LINK_XPATH)
+        self.next_selector = compile_selector(source.get('next_selector'), source.get('next_xpath'),
+                                              DEFAULT_NEXT_XPATH)
+        self.max_pages = int(source.get('max_pages', max_pages))
+
+    def extract(self, content: bytes, page_url: str,
+                content_type: str = '') -> Tuple[List[Dict[str, str]], Optional[str]]:
+        """Return the document links and the URL of the next page (or None) of a listing page"""
+        root = parse_html(content, content_type)
+        parts = urlsplit(page_url)
+        origin = f"{parts.scheme}://{parts.netloc}"
+        links = []
+        for element in self.link_selector(root):
+            href = element.get('href')
+            if not href:
+                continue
+            # Same title as BeautifulSoup's get_text(strip=True)
+            title = "".join(text.strip() for text in element.itertext()) or element.get('title', '')
+            links.append({
+                'url': absolute_url(page_url, origin, href),
+                'title': title,
+                'source_page': page_url
+            })
+        return links, self.next_page(root, page_url)
+
+    def next_page(self, root, page_url: str) -> Optional[str]:
+        for element in self.next_selector(root):
+            href = element.get('href') if hasattr(element, 'get') else str(element)
+            if href:
+                next_url = urljoin(page_url, href)
+                if next_url != page_url:
+                    return next_url
+        return None
+
@@ -0,0 +1,166 @@
+import asyncio
+import random
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Optional
+
+from google.api_core import exceptions as api_exceptions
+
+from config import AppConfig
+from metrics import metrics
+from text_chunking import estimate_tokens
+
+# Length of the quota window the RPM and TPM budgets apply to
+WINDOW_SECONDS = 60.0
+
+# Errors worth retrying; everything else fails the request immediately
+RETRYABLE_ERRORS = (
+    api_exceptions.TooManyRequests,
+    api_exceptions.ResourceExhausted,
+    api_exceptions.ServiceUnavailable,
+    api_exceptions.InternalServerError,
+    api_exceptions.DeadlineExceeded
+)
+RATE_LIMIT_ERRORS = (api_exceptions.TooManyRequests, api_exceptions.ResourceExhausted)
+
+RETRY_DELAY_PATTERN = re.compile(
+    r'retry in ([\d.]+)\s*s|retryDelay"?\s*:\s*"([\d.]+)s"|retry_delay\s*\{\s*seconds:\s*(\d+)'
+)
+
+
+def retry_delay_from_error(error: Exception) -> Optional[float]:
+    """Read the delay requested by the Gemini API from a quota error, None if there is none"""
+    for detail in getattr(error, 'details', None) or []:
+        if isinstance(detail, dict) and 'retryDelay' in detail:
+            return float(str(detail['retryDelay']).rstrip('s'))
+        delay = getattr(detail, 'retry_delay', None)
+        if delay is not None and hasattr(delay, 'seconds'):
+            return delay.seconds + delay.nanos / 1e9
+    match = RETRY_DELAY_PATTERN.search(str(error))
+    if match:
+        return float(next(group for group in match.groups() if group))
+    return None
+
+
+class GeminiScheduler:
+    """Runs Gemini requests concurrently within requests- and tokens-per-minute budgets.
+
+    Prompt tokens are estimated before sending and every request waits until it
+    fits into the sliding one-minute window, then the estimate is replaced with
+    the usage reported by the API. Requests run on a background event loop with
+    the async client, or in threads when the REST transport is used. Rate limit
+    errors pause all requests for the delay asked by the API; other transient
+    errors are retried with jittered exponential backoff. The last error is
+    raised once the retries are exhausted.
+    """
+
+    def __init__(self, model, use_async_client: bool = True, config: Optional[AppConfig] = None):
+        config = config or AppConfig()
+        self.model = model
+        self.use_async_client = use_async_client
+        self.rpm = config.gemini_rpm
+        self.tpm = config.gemini_tpm
+        self.concurrency = config.gemini_concurrency
+        self.max_retries = config.gemini_max_retries
+        self.retry_backoff = config.gemini_retry_backoff
+
+        # [start time, tokens] of every request sent within the last window
+        self._window = deque()
+        self._paused_until = 0.0
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name='gemini-scheduler', daemon=True)
+        self._thread.start()
+        # asyncio primitives must be created inside the loop they are used on
+        self._budget_lock, self._slots = asyncio.run_coroutine_threadsafe(self._create_primitives(),
+                                                                          self._loop).result()
+
+    async def _create_primitives(self):
+        return asyncio.Lock(), asyncio.Semaphore(self.concurrency)
+
+    def submit(self, prompt: str) -> Future:
+        """Schedule a prompt, the future resolves to the generated text"""
+        return asyncio.run_coroutine_threadsafe(self._generate(prompt), self._loop)
+
+    def generate(self, prompt: str) -> str:
+        """Send a prompt and wait for the generated text"""
+        return self.submit(prompt).result()
+
+    async def _generate(self, prompt: str) -> str:
+        estimated_tokens = estimate_tokens(prompt)
+        async with self._slots:
+            for attempt in range(self.max_retries + 1):
+                entry = await self._acquire(estimated_tokens)
+                try:
+                    with metrics.timer('gemini.request'):
+                        response = await self._send(prompt)
+                except RETRYABLE_ERRORS as e:
+                    if attempt == self.max_retries:
+                        metrics.incr('gemini.retries_exhausted')
+                        raise
+                    delay = self._retry_delay(e, attempt)
+                    print(f"Gemini request failed (attempt {attempt + 1}), retrying in {delay:.1f} s: {e}")
+                    metrics.incr('gemini.retries')
+                    await asyncio.sleep(delay)
+                    continue
+
+                metrics.incr('gemini.requests')
+                usage = getattr(response, 'usage_metadata', None)
+                if usage is not None:
+                    metrics.incr('gemini.prompt_tokens', getattr(usage, 'prompt_token_count', 0) or 0)
+                    metrics.incr('gemini.response_tokens', getattr(usage, 'candidates_token_count', 0) or 0)
+                    entry[1] = getattr(usage, 'total_token_count', 0) or entry[1]
+                return response.text
+
+    async def _send(self, prompt: str):
+        if self.use_async_client:
+            return await self.model.generate_content_async(prompt)
+        return await self._loop.run_in_executor(None, self.model.generate_content, prompt)
+
+    def _retry_delay(self, error: Exception, attempt: int) -> float:
+        requested = retry_delay_from_error(error)
+        if isinstance(error, RATE_LIMIT_ERRORS):
+            metrics.incr('gemini.rate_limited')
+            delay = (requested if requested is not None else self.retry_backoff * 2 ** attempt) * random.uniform(1, 1.2)
+            # Hold back every queued request, not only the one that hit the limit
+            self._paused_until = max(self._paused_until, time.monotonic() + delay)
+            return delay
+        if requested is not None:
+            return requested * random.uniform(1, 1.2)
+        return self.retry_backoff * 2 ** attempt * random.uniform(0.8, 1.2)
+
+    async def _acquire(self, tokens: int) -> list:
+        """Wait until a request of `tokens` fits into the budgets and record it"""
+        waited_from = time.monotonic()
+        async with self._budget_lock:
+            while True:
+                now = time.monotonic()
+                while self._window and self._window[0][0] <= now - WINDOW_SECONDS:
+                    self._window.popleft()
+                wait = max(self._paused_until - now, self._budget_wait(tokens, now))
+                if wait <= 0:
+                    entry = [now, tokens]
+                    self._window.append(entry)
+                    metrics.observe('gemini.budget_wait', now - waited_from)
+                    return entry
+                await asyncio.sleep(wait)
+
+    def _budget_wait(self, tokens: int, now: float) -> float:
+        """Seconds until enough of the window expires for another request"""
+        wait = 0.0
+        if self.rpm and len(self._window) >= self.rpm:
+            wait = self._window[len(self._window) - self.rpm][0] + WINDOW_SECONDS - now
+        if self.tpm and self._window:
+            excess = sum(entry[1] for entry in self._window) + tokens - self.tpm
+            for started, used in self._window:
+                if excess <= 0:
+                    break
+                excess -= used
+                wait = max(wait, started + WINDOW_SECONDS - now)
+        return wait
+
+    def close(self):
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
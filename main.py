@@ -4,23 +4,31 @@ Děčín City Council PDF Monitor
 Monitors city council URLs for new PDF documents and posts summaries to Telegram
 """
 
+import argparse
 import os
-import json
 import hashlib
-from turtle import title
-import requests
+import signal
+import tempfile
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from functools import cached_property
 from pathlib import Path
-from typing import List, Dict, Set
-from urllib.parse import urljoin
-import time
-from bs4 import BeautifulSoup
-import PyPDF2
-import google.generativeai as genai
+from typing import BinaryIO, List, Dict, Optional, Tuple
 from config import AppConfig
-from facebook_notifier import FacebookNotifier
-from rss_feed_updater import RssFeedUpdater
-from telegram_notifier import TelegramNotifier
+from document_pipeline import DocumentPipeline
+from link_extraction import LinkExtractor
+from metrics import metrics
+from page_cache import PageValidatorCache
+from page_crawler import PageCrawler
+from processed_store import ProcessedDocumentStore
+from publisher import DELIVERED, UNCONFIRMED
+from summary_cache import SummaryCache
+from text_chunking import PAGE_SEPARATOR, estimate_tokens, split_into_chunks
+
+# Publishing channels every processed document is queued for
+CHANNELS = ('telegram', 'rss', 'facebook')
 
 # Load environment variables from .env file if it exists
 try:
@@ -34,196 +42,466 @@ except ImportError:
 class DecinPDFMonitor:
     def __init__(self):
         self.config = AppConfig()
-
-        # Configure Gemini
-        genai.configure(api_key=self.config.gemini_api_key)
-        self.model = genai.GenerativeModel(self.config.gemini_model_name)
-        # File to track processed PDFs
+        # Legacy file with processed PDF URLs, migrated into the store on first run
         self.tracking_file = "processed_pdfs.json"
 
-        # Load previously processed PDFs
-        self.processed_pdfs = self.load_processed_pdfs()
+        # Store of previously processed PDFs
+        self.processed_pdfs = ProcessedDocumentStore(
+            str(Path(self.tracking_file).with_name("processed_documents.db")),
+            legacy_json=self.tracking_file
+        )
 
-        # Create TelegramNotifier instance
-        self.notifier = TelegramNotifier()
-        self.rss_feed = RssFeedUpdater()
-        self.facebook_notifier = FacebookNotifier()
-        
-    def load_processed_pdfs(self) -> Set[str]:
-        """Load list of previously processed PDF URLs"""
-        try:
-            if Path(self.tracking_file).exists():
-                with open(self.tracking_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    return set(data.get('processed_pdfs', []))
-        except Exception as e:
-            print(f"Error loading tracking file: {e}")
-        return set()
-    
-    def save_processed_pdfs(self):
-        """Save list of processed PDF URLs"""
-        try:
-            data = {
-                'processed_pdfs': list(self.processed_pdfs),
-                'last_updated': datetime.now().isoformat()
-            }
-            with open(self.tracking_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            print(f"Error saving tracking file: {e}")
-    
-    def get_pdf_links_from_page(self, url: str) -> List[Dict[str, str]]:
-        """Extract PDF links from a webpage"""
+        # Shared keep-alive HTTP client for pages and PDFs
+        self.crawler = PageCrawler(config=self.config)
+        # Validators of listing pages, stored next to the tracking file
+        self.page_cache = PageValidatorCache(str(Path(self.tracking_file).with_name("page_cache.json")))
+        # Compiled link selectors of every monitored source
+        self.link_extractors = {source['url']: LinkExtractor(source, self.config.listing_max_pages)
+                                for source in self.config.urls_to_monitor}
+
+        # Gemini, PDF extraction and the publishing clients are heavy to import and
+        # set up, they are only created once there is a document to process
+
+    @cached_property
+    def model(self):
+        import google.generativeai as genai
+        if self.config.gemini_api_endpoint:
+            genai.configure(api_key=self.config.gemini_api_key, transport='rest',
+                            client_options={'api_endpoint': self.config.gemini_api_endpoint})
+        else:
+            genai.configure(api_key=self.config.gemini_api_key)
+        return genai.GenerativeModel(self.config.gemini_model_name)
+
+    @cached_property
+    def gemini(self):
+        from llm_scheduler import GeminiScheduler
+        # The async client needs the gRPC transport
+        return GeminiScheduler(self.model, use_async_client=not self.config.gemini_api_endpoint,
+                               config=self.config)
+
+    @cached_property
+    def extractor(self):
+        from pdf_extraction import PdfTextExtractor
+        return PdfTextExtractor(self.config)
+
+    @cached_property
+    def dedup_index(self):
+        if not self.config.dedup_enabled:
+            return None
+        from dedup import DedupIndex
+        return DedupIndex(self.processed_pdfs, self.config)
+
+    @cached_property
+    def search_index(self):
+        from search_index import SearchIndex
+        index = SearchIndex(str(Path(self.tracking_file).with_name("search_index.db")))
+        index.backfill(self.processed_pdfs.all_documents)
+        return index
+
+    @cached_property
+    def summary_cache(self) -> SummaryCache:
+        # Summaries of already seen document contents
+        return SummaryCache(
+            str(Path(self.tracking_file).with_name("summary_cache.json")),
+            self.config.gemini_model_name,
+            prompt=self.config.summary_prompt_fingerprint(),
+            max_entries=self.config.summary_cache_max_entries,
+            max_age_days=self.config.summary_cache_max_age_days
+        )
+
+    @cached_property
+    def publisher(self):
+        from facebook_notifier import FacebookNotifier
+        from publisher import PublishDispatcher
+        from rss_feed_updater import RssFeedUpdater
+        from telegram_notifier import TelegramNotifier
+
+        self.notifier = TelegramNotifier(self.config)
+        self.rss_feed = RssFeedUpdater(self.config)
+        self.facebook_notifier = FacebookNotifier(self.config)
+        return PublishDispatcher({
+            'telegram': self.notifier.send_pdf_message,
+            'rss': self.rss_feed.add_item,
+            'facebook': self.facebook_notifier.create_post
+        }, batch_sinks={'rss': self.rss_feed.add_items, 'facebook': self.facebook_notifier.create_posts},
+            config=self.config)
+
+    @cached_property
+    def pipeline(self) -> DocumentPipeline:
+        return DocumentPipeline(
+            download=self.download_pdf,
+            extract=self.extract_pdf_text,
+            summarize=self.summarize_document,
+            record=self.record_document,
+            config=self.config
+        )
+
+    def prepare_processing(self):
+        """Create the clients used by the pipeline before its worker threads start"""
+        return self.extractor, self.gemini, self.summary_cache, self.dedup_index, self.search_index, self.pipeline
+
+    def get_source_links(self, source: Dict[str, str]) -> List[Dict[str, str]]:
+        """Collect PDF links from a monitored source, following its listing pages up to the limit"""
+        extractor = self.link_extractors[source['url']]
+        pdf_links = []
+        visited = set()
+        url = source['url']
+        while url and url not in visited and len(visited) < extractor.max_pages:
+            visited.add(url)
+            links, url = self.get_pdf_links_from_page(url, extractor)
+            pdf_links.extend(links)
+        return pdf_links
+
+    def get_pdf_links_from_page(self, url: str,
+                                extractor: LinkExtractor) -> Tuple[List[Dict[str, str]], Optional[str]]:
+        """Extract PDF links and the next listing page from a webpage"""
         try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-            }
-            response = requests.get(url, headers=headers, timeout=30)
+            with metrics.timer('crawl.fetch'):
+                response = self.crawler.fetch(url, headers=self.page_cache.conditional_headers(
+                    url, extractor.fingerprint))
+            metrics.incr('crawl.bytes', len(response.content))
+            if response.status_code == 304:
+                self.page_cache.mark_skipped(url, 'not_modified', response)
+                return self.page_cache.cached_links(url), self.page_cache.cached_next_page(url)
             response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            pdf_links = []
-            
-            # Find all links that end with .pdf
-            for link in soup.find_all('a', href=True):
-                href = link['href']
-                if href.lower().endswith('/file'):
-                    # Convert relative URLs to absolute
-                    full_url = urljoin(url, href)
-                    title = link.get_text(strip=True) or link.get('title', '')
-                    pdf_links.append({
-                        'url': full_url,
-                        'title': title,
-                        'source_page': url
-                    })
-            
-            return pdf_links
+
+            content_hash = hashlib.sha256(response.content).hexdigest()
+            if self.page_cache.is_unchanged(url, content_hash, extractor.fingerprint):
+                self.page_cache.mark_skipped(url, 'unchanged', response)
+                return self.page_cache.cached_links(url), self.page_cache.cached_next_page(url)
+
+            with metrics.timer('crawl.parse'):
+                pdf_links, next_page = extractor.extract(response.content, url,
+                                                         response.headers.get('Content-Type', ''))
+
+            pending_links = [pdf for pdf in pdf_links if pdf['url'] not in self.processed_pdfs]
+            self.page_cache.store(url, response, content_hash, extractor.fingerprint, pending_links, next_page)
+            return pdf_links, next_page
             
         except Exception as e:
             print(f"Error fetching PDF links from {url}: {e}")
-            return []
+            return [], None
     
+    def download_pdf(self, pdf_url: str) -> BinaryIO:
+        """Stream a PDF into a spooled buffer that spills to disk above the configured size"""
+        with metrics.timer('download'):
+            response = self.crawler.fetch(pdf_url, stream=True)
+            with response:
+                response.raise_for_status()
+                buffer = tempfile.SpooledTemporaryFile(max_size=self.config.pdf_spool_max_bytes)
+                for chunk in response.iter_content(chunk_size=64 * 1024):
+                    buffer.write(chunk)
+            metrics.incr('download.bytes', buffer.tell())
+            metrics.incr('download.documents')
+        buffer.seek(0)
+        return buffer
+
+    def extract_pdf_text(self, pdf_file: BinaryIO) -> str:
+        """Extract text from all pages of a PDF file object"""
+        with metrics.timer('extract'):
+            pages = self.extractor.extract_pages(pdf_file)
+        metrics.incr('extract.pages', len(pages))
+        return ("\n" + PAGE_SEPARATOR).join(pages).strip()
+
     def download_pdf_content(self, pdf_url: str) -> str:
         """Download and extract text from PDF"""
         try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-            }
-            response = requests.get(pdf_url, headers=headers, timeout=30)
-            response.raise_for_status()
-            
-            # Save PDF temporarily
-            temp_pdf = f"temp_{hashlib.md5(pdf_url.encode()).hexdigest()}.pdf"
-            with open(temp_pdf, 'wb') as f:
-                f.write(response.content)
-            
-            # Extract text using PyPDF2
-            text = ""
-            try:
-                with open(temp_pdf, 'rb') as f:
-                    pdf_reader = PyPDF2.PdfReader(f)
-                    for page in pdf_reader.pages:
-                        text += page.extract_text() + "\n"
-            finally:
-                # Clean up temp file
-                if Path(temp_pdf).exists():
-                    Path(temp_pdf).unlink()
-            
-            return text.strip()
-            
+            with self.download_pdf(pdf_url) as pdf_file:
+                return self.extract_pdf_text(pdf_file)
         except Exception as e:
             print(f"Error downloading/processing PDF {pdf_url}: {e}")
             return ""
     
     def generate_summary(self, text: str, title: str) -> str:
         """Generate summary using Google Gemini"""
-        try:
+        with metrics.timer('summarize'):
+            return self._generate_summary(text, title)
+
+    def _generate_summary(self, text: str, title: str) -> str:
+        content_hash = SummaryCache.content_hash(text)
+        cached = self.summary_cache.get(content_hash)
+        if cached is not None:
+            print(f"Reusing cached summary for '{title}'")
+            return cached
 
-            prompt = self.config.gemini_prompt.format(title=title, text=text)
-            response = self.model.generate_content(prompt)
-            return response.text
+        try:
+            if estimate_tokens(text) > self.config.gemini_chunk_threshold_tokens:
+                summary = self.generate_chunked_summary(text, title)
+            else:
+                summary = self.request_summary(self.config.gemini_prompt.format(title=title, text=text))
+            self.summary_cache.put(content_hash, summary)
+            return summary
             
         except Exception as e:
             print(f"Error generating summary with Gemini: {e}")
+            metrics.incr('gemini.fallbacks')
             # Fallback to simple summary
             lines = text.split('\n')
             summary_lines = [line.strip() for line in lines[:10] if line.strip()]
             return f"Automatický souhrn dokumentu '{title}':\n\n" + '\n'.join(summary_lines)
 
     
-    def process_new_pdfs(self):
-        """Main function to check for new PDFs and process them"""
-        print(f"Starting PDF monitoring at {datetime.now()}")
-        
+    def request_summary(self, prompt: str) -> str:
+        """Send a single prompt to Gemini through the request scheduler"""
+        return self.gemini.generate(prompt)
+
+    def generate_chunked_summary(self, text: str, title: str) -> str:
+        """Summarize a long document chunk by chunk and combine the partial summaries"""
+        chunks = split_into_chunks(text, self.config.gemini_chunk_tokens)
+        print(f"Summarizing '{title}' in {len(chunks)} chunks")
+
+        def summarize_chunk(part: int) -> str:
+            prompt = self.config.gemini_chunk_prompt.format(
+                title=title, part=part + 1, parts=len(chunks), text=chunks[part]
+            )
+            return self.request_summary(prompt)
+
+        with ThreadPoolExecutor(max_workers=self.config.gemini_chunk_concurrency) as executor:
+            partial_summaries = list(executor.map(summarize_chunk, range(len(chunks))))
+
+        combined = ("\n" + PAGE_SEPARATOR).join(partial_summaries)
+        # Reduce again in chunks while the partial summaries are too long but still shrinking
+        if estimate_tokens(combined) > self.config.gemini_chunk_threshold_tokens and len(combined) < len(text):
+            return self.generate_chunked_summary(combined, title)
+        return self.request_summary(self.config.gemini_reduce_prompt.format(title=title, text=combined))
+
+    def find_new_pdfs(self, sources: Optional[List[Dict[str, str]]] = None,
+                      save_page_cache: bool = True) -> List[Dict[str, str]]:
+        """Crawl monitored pages (all by default) and return links that were not processed yet"""
         all_new_pdfs = []
+        queued_urls = set()
+        discovered_at = datetime.now().isoformat()
         
-        # Check each monitored URL
-        print(f"Urls to monitor: {self.config.urls_to_monitor}")
-        for item in self.config.urls_to_monitor:
+        # Fetch all monitored URLs concurrently
+        sources = self.config.urls_to_monitor if sources is None else sources
+        print(f"Urls to monitor: {sources}")
+        self.page_cache.reset_stats()
+        with metrics.timer('crawl'):
+            crawled = self.crawler.crawl(sources, self.get_source_links)
+        if save_page_cache:
+            self.page_cache.save()
+        print(f"Listing pages skipped as unchanged: {self.page_cache.skipped_count()} "
+              f"(304: {self.page_cache.stats['not_modified']}, same body: {self.page_cache.stats['unchanged']}, "
+              f"parsed: {self.page_cache.stats['fetched']})")
+
+        for item, pdf_links in zip(sources, crawled):
             print(f"Checking URL: {item['url']}")
-            pdf_links = self.get_pdf_links_from_page(item['url'])
-            
-            # Filter out already processed PDFs
-            new_pdfs = [pdf for pdf in pdf_links if pdf['url'] not in self.processed_pdfs]
+            # Filter out already processed PDFs and links seen on another page
+            new_pdfs = [pdf for pdf in pdf_links
+                        if pdf['url'] not in self.processed_pdfs and pdf['url'] not in queued_urls]
             
             if new_pdfs:
                 print(f"Found {len(new_pdfs)} new PDFs on {item['url']}")
                 for pdf in new_pdfs:
                     pdf['source_title'] = item['title']
-
-                all_new_pdfs.append(new_pdfs[0]) #processing pdf one per day
-                break
+                    pdf['discovered_at'] = discovered_at
+                    pdf['monitored_url'] = item['url']
+                    queued_urls.add(pdf['url'])
+                all_new_pdfs.extend(new_pdfs)
             else:
                 print(f"No new PDFs found on {item['url']}")
-            
-            # Small delay between requests
-            time.sleep(2)
-        
-        if not all_new_pdfs:
+        # Position in listing order, documents are published in this order
+        for sequence, pdf in enumerate(all_new_pdfs):
+            pdf['sequence'] = sequence
+        return all_new_pdfs
+
+    def check_new_pdfs(self) -> List[Dict[str, str]]:
+        """Report new links without downloading, summarizing or publishing anything"""
+        print(f"Checking for new PDFs at {datetime.now()}")
+        metrics.reset()
+        # Validators are not saved so the next full run still fetches the listing pages
+        new_pdfs = self.find_new_pdfs(save_page_cache=False)
+        for pdf in new_pdfs:
+            print(f"New: {pdf['title']} ({pdf['source_title']}) {pdf['url']}")
+        print(f"{len(new_pdfs)} new PDFs, {len(self.processed_pdfs.pending_deliveries())} channels with pending deliveries")
+        return new_pdfs
+
+    def process_new_pdfs(self, sources: Optional[List[Dict[str, str]]] = None) -> List[Dict[str, str]]:
+        """Main function to check for new PDFs and process them, returns the new PDFs found"""
+        print(f"Starting PDF monitoring at {datetime.now()}")
+        metrics.reset()
+
+        all_new_pdfs = self.find_new_pdfs(sources)
+        if all_new_pdfs:
+            self.prepare_processing()
+            with metrics.timer('pipeline'):
+                processed = self.pipeline.run(all_new_pdfs)
+            self.summary_cache.save()
+            if self.dedup_index is not None:
+                self.dedup_index.prune()
+            print(f"Summary cache hits: {self.summary_cache.hits}, misses: {self.summary_cache.misses}")
+            print(f"Processed {len(processed)} new PDFs")
+        else:
             print("No new PDFs found across all monitored URLs")
+
+        with metrics.timer('publish'):
+            self.publish_documents()
+        self.write_run_report()
+        return all_new_pdfs
+
+    def watch(self, stop: Optional[threading.Event] = None):
+        """Keep polling every source on its own adaptive interval until stopped.
+
+        Sessions, caches and the Gemini client stay alive between polls.
+        """
+        from poll_scheduler import PollScheduler
+
+        stop = stop or threading.Event()
+        scheduler = PollScheduler(self.config.urls_to_monitor, self.processed_pdfs.discovery_history(), self.config)
+        print(f"Watching {len(self.config.urls_to_monitor)} sources")
+        while not stop.is_set():
+            due = scheduler.due_sources()
+            if due:
+                try:
+                    new_pdfs = self.process_new_pdfs(due)
+                except Exception as e:
+                    print(f"Error checking sources: {e}")
+                    new_pdfs = []
+                found = Counter(pdf['monitored_url'] for pdf in new_pdfs)
+                for source in due:
+                    scheduler.record_poll(source['url'], found[source['url']])
+                print("Next polls in: " + ", ".join(f"{url} {seconds / 60:.0f} min"
+                                                    for url, seconds in scheduler.intervals().items()))
+            stop.wait(scheduler.seconds_until_next_poll())
+
+    def write_run_report(self):
+        """Write metrics of this run as JSON and optionally in Prometheus text format"""
+        try:
+            metrics.write_json(self.config.metrics_report_file)
+            if self.config.metrics_prometheus_file:
+                metrics.write_prometheus(self.config.metrics_prometheus_file)
+        except Exception as e:
+            print(f"Error writing run report: {e}")
+        report = metrics.report()
+        print(f"Run finished in {report['wall_time']:.1f} s: " + ", ".join(
+            f"{name} {stats['total']:.1f} s" for name, stats in report['timings'].items()
+            if name in ('crawl', 'pipeline', 'publish')))
+
+    def summarize_document(self, pdf_info: Dict[str, str], text: str) -> Optional[str]:
+        """Summarization stage of the document pipeline"""
+        pdf_info['content_hash'] = SummaryCache.content_hash(text)
+        # Kept until the document is recorded and indexed
+        pdf_info['text'] = text
+        match = None
+        if self.dedup_index is not None:
+            match = self.dedup_index.match_and_add(pdf_info['url'], text, pdf_info['content_hash'])
+        if match is None:
+            return self.generate_summary(text, pdf_info['title'])
+        return self.summarize_duplicate(pdf_info, text, match)
+
+    def summarize_duplicate(self, pdf_info: Dict[str, str], text: str, match: Dict) -> Optional[str]:
+        """Reuse the summary of an earlier copy, or summarize only the changes of a new revision.
+
+        A copy is never published, so it costs no Gemini call. When the earlier
+        copy is still being summarized in this run, the copy is recorded without
+        a summary.
+        """
+        title = pdf_info['title']
+        previous = self.processed_pdfs.get(match['url'])
+        previous_summary = previous.get('summary') if previous else None
+        added, removed = [], []
+        if not match['exact'] and match['previous_text'] is not None:
+            from dedup import changed_lines
+            added, removed = changed_lines(match['previous_text'], text)
+
+        if not added and not removed:
+            print(f"'{title}' duplicates {match['url']} ({match['similarity']:.0%} similar), not publishing it again")
+            pdf_info['duplicate_of'] = match['url']
+            return previous_summary
+
+        print(f"'{title}' is a revision of {match['url']} ({match['similarity']:.0%} similar), summarizing the changes")
+        # Keep the changes within the size of one chunk prompt
+        limit = self.config.gemini_chunk_tokens * 4
+        try:
+            with metrics.timer('summarize.diff'):
+                changes = self.request_summary(self.config.gemini_diff_prompt.format(
+                    title=title,
+                    previous_summary=previous_summary or '',
+                    added="\n".join(added)[:limit] or '-',
+                    removed="\n".join(removed)[:limit] or '-'
+                ))
+        except Exception as e:
+            print(f"Error summarizing changes with Gemini: {e}")
+            metrics.incr('gemini.fallbacks')
+            changes = "Přidané řádky:\n" + "\n".join(added[:10])
+        return f"Nová verze dokumentu {match['url']}\n\n{changes}"
+
+    def record_document(self, pdf_info: Dict[str, str]):
+        """Persist and index a summarized document and queue it for every publishing channel.
+
+        Duplicates of earlier documents are recorded without being published again.
+        """
+        text = pdf_info.pop('text', None)
+        channels = () if pdf_info.get('duplicate_of') else CHANNELS
+        self.processed_pdfs.add_with_outbox(pdf_info, channels)
+        self.search_index.add(pdf_info, text)
+
+    def publish_documents(self):
+        """Deliver all documents waiting in the outbox, including those left over from earlier runs"""
+        unconfirmed = self.processed_pdfs.unconfirmed_deliveries()
+        if unconfirmed:
+            print(f"{len(unconfirmed)} deliveries may or may not have been published, check them and run "
+                  f"with --resolve-unconfirmed delivered or resend: "
+                  + ", ".join(f"{row['url']} ({row['channel']})" for row in unconfirmed))
+        pending = self.processed_pdfs.pending_deliveries()
+        if not pending:
             return
-        
-        # Process each new PDF
-        for pdf_info in all_new_pdfs:
-            try:
-                print(f"Processing: {pdf_info['title']} - {pdf_info['url']}")
-                pdf_text = self.download_pdf_content(pdf_info['url'])
-                if not pdf_text:
-                    print(f"Could not extract text from {pdf_info['url']}")
-                    pdf_info['summary'] = "Byl přidán nový dokument, nepodařilo se ale získat text z dokumentu. "
-                else:
-                    pdf_info['summary'] = self.generate_summary(pdf_text, pdf_info['title'])
-                self.processed_pdfs.add(pdf_info['url'])
-                
-                # Small delay between processing
-                time.sleep(3)
-                
-            except Exception as e:
-                print(f"Error processing PDF {pdf_info['url']}: {e}")
-                continue
-        
+        print("Pending deliveries: " + ", ".join(f"{channel}: {len(docs)}" for channel, docs in pending.items()))
+
+        def on_result(channel: str, pdf_info: Dict[str, str], status: str, error: str):
+            if status == UNCONFIRMED:
+                self.processed_pdfs.mark_unconfirmed(pdf_info['url'], channel, error)
+            else:
+                self.processed_pdfs.mark_delivery(pdf_info['url'], channel, status == DELIVERED, error,
+                                                  max_attempts=self.config.outbox_max_attempts)
+            if status != DELIVERED:
+                print(f"Delivery of {pdf_info['url']} to {channel}: {status}")
+
+        self.publisher.publish(pending, on_result=on_result)
+
 
-        self.notifier.send_messages_to_telegram(all_new_pdfs)
-        self.rss_feed.update_feed(all_new_pdfs)
-        self.facebook_notifier.create_posts(all_new_pdfs)
-        self.save_processed_pdfs()
-        print(f"Processed {len(all_new_pdfs)} new PDFs")
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--check-only', action='store_true',
+                      help='only report new PDF links, do not summarize or publish them')
+    mode.add_argument('--watch', action='store_true',
+                      help='keep running and poll every source on its own adaptive interval')
+    mode.add_argument('--resolve-unconfirmed', choices=('delivered', 'resend'),
+                      help='settle deliveries whose outcome is unknown, e.g. after a timed out batch post')
+    return parser.parse_args()
 
 
 def main():
     """Main entry point"""
+    args = parse_args()
+
     # Validate environment variables
     required_vars = ['TELEGRAM_BOT_TOKEN', 'TELEGRAM_CHAT_ID', 'GEMINI_API_KEY']
     missing_vars = [var for var in required_vars if not os.getenv(var)]
     
-    if missing_vars:
+    if missing_vars and not (args.check_only or args.resolve_unconfirmed):
         print(f"Missing required environment variables: {', '.join(missing_vars)}")
         print("Please set these variables in your GitHub repository secrets.")
         return 1
     
     try:
         monitor = DecinPDFMonitor()
-        monitor.process_new_pdfs()
+        if args.check_only:
+            monitor.check_new_pdfs()
+        elif args.resolve_unconfirmed:
+            count = monitor.processed_pdfs.resolve_unconfirmed(args.resolve_unconfirmed == 'delivered')
+            print(f"Resolved {count} unconfirmed deliveries as {args.resolve_unconfirmed}")
+        elif args.watch:
+            stop = threading.Event()
+            signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+            try:
+                monitor.watch(stop)
+            except KeyboardInterrupt:
+                pass
+            print("Watch mode stopped")
+        else:
+            monitor.process_new_pdfs()
         return 0
     except Exception as e:
         print(f"Fatal error: {e}")
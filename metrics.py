@@ -0,0 +1,97 @@
+import json
+import math
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of a list of values"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+class RunMetrics:
+    """Thread-safe timings and counters of one monitoring run"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.started_at = datetime.now()
+            self._started = time.perf_counter()
+            self.counters = defaultdict(float)
+            self.timings = defaultdict(list)
+
+    @contextmanager
+    def timer(self, name: str):
+        """Measure the wall time of a block as one observation of `name`"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def observe(self, name: str, seconds: float):
+        with self._lock:
+            self.timings[name].append(seconds)
+
+    def incr(self, name: str, value: float = 1):
+        with self._lock:
+            self.counters[name] += value
+
+    def report(self) -> Dict:
+        """Structured summary of the run"""
+        with self._lock:
+            timings = {name: list(values) for name, values in self.timings.items()}
+            counters = dict(self.counters)
+        return {
+            'started_at': self.started_at.isoformat(),
+            'finished_at': datetime.now().isoformat(),
+            'wall_time': time.perf_counter() - self._started,
+            'counters': {name: int(value) if value == int(value) else value
+                         for name, value in sorted(counters.items())},
+            'timings': {name: {
+                'count': len(values),
+                'total': sum(values),
+                'min': min(values),
+                'max': max(values),
+                'p50': percentile(values, 0.5),
+                'p95': percentile(values, 0.95)
+            } for name, values in sorted(timings.items())}
+        }
+
+    def write_json(self, path: str):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, ensure_ascii=False, indent=2)
+
+    def write_prometheus(self, path: str):
+        """Write the report in the Prometheus text exposition format"""
+        report = self.report()
+        lines = [
+            "# TYPE summarizer_run_seconds gauge",
+            f"summarizer_run_seconds {report['wall_time']:.6f}",
+            "# TYPE summarizer_stage_seconds summary"
+        ]
+        for name, stats in report['timings'].items():
+            lines.append(f'summarizer_stage_seconds{{stage="{name}",quantile="0.5"}} {stats["p50"]:.6f}')
+            lines.append(f'summarizer_stage_seconds{{stage="{name}",quantile="0.95"}} {stats["p95"]:.6f}')
+            lines.append(f'summarizer_stage_seconds_sum{{stage="{name}"}} {stats["total"]:.6f}')
+            lines.append(f'summarizer_stage_seconds_count{{stage="{name}"}} {stats["count"]}')
+        lines.append("# TYPE summarizer_events_total counter")
+        for name, value in report['counters'].items():
+            lines.append(f'summarizer_events_total{{name="{name}"}} {value}')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write("\n".join(lines) + "\n")
+
+
+# Metrics of the current run, shared by all components
+metrics = RunMetrics()
@@ -0,0 +1,132 @@
+import hashlib
+import importlib.util
+import math
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from config import AppConfig
+from metrics import metrics
+
+
+def ocr_available(language: str) -> bool:
+    """Check that the renderer, pytesseract and the Tesseract language pack are installed"""
+    for module in ('pypdfium2', 'pytesseract'):
+        if importlib.util.find_spec(module) is None:
+            print(f"OCR disabled, missing module: {module}")
+            return False
+    import pytesseract
+    try:
+        languages = pytesseract.get_languages()
+    except Exception as e:
+        print(f"OCR disabled, Tesseract is not installed: {e}")
+        return False
+    missing = [lang for lang in language.split('+') if lang not in languages]
+    if missing:
+        print(f"OCR disabled, missing Tesseract language data: {', '.join(missing)}")
+        return False
+    return True
+
+
+def _ocr_pages(path: str, indices: List[int], language: str, scale: float,
+               cache_dir: Optional[str]) -> List[Tuple[str, bool]]:
+    """Process pool entry point, returns (text, cache hit) for every page index.
+
+    Pages are rendered first and cached by a hash of the rendered bitmap, so the
+    same scanned page is recognized only once even inside different documents.
+    """
+    import pypdfium2
+    import pytesseract
+
+    results = []
+    document = pypdfium2.PdfDocument(path)
+    try:
+        for index in indices:
+            page = document[index]
+            image = page.render(scale=scale, grayscale=True).to_pil()
+            page.close()
+            page_hash = hashlib.sha256(image.tobytes()).hexdigest()
+            cache_file = Path(cache_dir) / language / f"{page_hash}.txt" if cache_dir else None
+            if cache_file is not None and cache_file.exists():
+                results.append((cache_file.read_text(encoding='utf-8'), True))
+                continue
+            text = pytesseract.image_to_string(image, lang=language)
+            if cache_file is not None:
+                cache_file.parent.mkdir(parents=True, exist_ok=True)
+                cache_file.write_text(text, encoding='utf-8')
+            results.append((text, False))
+    finally:
+        document.close()
+    return results
+
+
+class PageOcr:
+    """Recognizes text of image-only PDF pages with Tesseract.
+
+    Only pages whose extracted text is shorter than OCR_MIN_CHARS are rendered
+    and recognized, spread over a process pool.
+    """
+
+    def __init__(self, cache_dir: Optional[Path] = None, config: Optional[AppConfig] = None):
+        config = config or AppConfig()
+        self.language = config.ocr_language
+        self.min_chars = config.ocr_min_chars
+        self.scale = config.ocr_render_scale
+        self.processes = config.ocr_processes or os.cpu_count() or 1
+        self.cache_dir = cache_dir
+        self.enabled = config.ocr_enabled and ocr_available(self.language)
+        self._pool = None
+        self._pool_lock = threading.Lock()
+
+    def pages_needing_ocr(self, pages: List[str]) -> List[int]:
+        return [index for index, text in enumerate(pages)
+                if len((text or '').strip()) < self.min_chars]
+
+    def needed(self, pages: List[str]) -> bool:
+        return self.enabled and bool(self.pages_needing_ocr(pages))
+
+    def fill_missing(self, path: str, pages: List[str]) -> List[str]:
+        """Return the page texts with image-only pages of the PDF at path replaced by their OCR text"""
+        if not self.enabled:
+            return pages
+        indices = self.pages_needing_ocr(pages)
+        if not indices:
+            return pages
+
+        print(f"Running OCR on {len(indices)} of {len(pages)} pages")
+        batch = math.ceil(len(indices) / self.processes)
+        batches = [indices[start:start + batch] for start in range(0, len(indices), batch)]
+        cache_dir = str(self.cache_dir) if self.cache_dir else None
+        pool = self._get_pool()
+        futures = [pool.submit(_ocr_pages, path, batch_indices, self.language, self.scale, cache_dir)
+                   for batch_indices in batches]
+
+        pages = list(pages)
+        with metrics.timer('ocr'):
+            for batch_indices, future in zip(batches, futures):
+                try:
+                    results = future.result()
+                except Exception as e:
+                    print(f"Error running OCR on pages {batch_indices}: {e}")
+                    continue
+                for index, (text, cache_hit) in zip(batch_indices, results):
+                    metrics.incr('ocr.cache_hits' if cache_hit else 'ocr.pages')
+                    if len(text.strip()) > len((pages[index] or '').strip()):
+                        pages[index] = text
+        return pages
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.processes,
+                                                 mp_context=multiprocessing.get_context('spawn'))
+            return self._pool
+
+    def close(self):
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
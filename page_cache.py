@@ -0,0 +1,110 @@
+import json
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import requests
+
+from metrics import metrics
+
+
+class PageValidatorCache:
+    """Persistent HTTP validator cache for monitored listing pages.
+
+    For each listing URL it remembers the ETag, Last-Modified header, a hash of
+    the page body, the links that were still unprocessed when the page was last
+    parsed and the next listing page, so unchanged pages can be skipped without
+    parsing them again. Entries also hold the fingerprint of the link selectors
+    they were parsed with, and count as missing once the selectors change.
+    """
+
+    def __init__(self, cache_file: str = "page_cache.json"):
+        self.cache_file = cache_file
+        self._lock = threading.Lock()
+        self.pages = self.load()
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.stats = {'fetched': 0, 'not_modified': 0, 'unchanged': 0}
+
+    def load(self) -> Dict[str, dict]:
+        """Load cached validators from disk"""
+        try:
+            if Path(self.cache_file).exists():
+                with open(self.cache_file, 'r', encoding='utf-8') as f:
+                    return json.load(f).get('pages', {})
+        except Exception as e:
+            print(f"Error loading page cache: {e}")
+        return {}
+
+    def save(self):
+        """Write cached validators to disk"""
+        try:
+            with self._lock:
+                data = {'pages': self.pages, 'last_updated': datetime.now().isoformat()}
+            with open(self.cache_file, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=1, sort_keys=True)
+        except Exception as e:
+            print(f"Error saving page cache: {e}")
+
+    def _entry(self, url: str, fingerprint: str) -> Optional[dict]:
+        entry = self.pages.get(url)
+        return entry if entry is not None and entry.get('fingerprint') == fingerprint else None
+
+    def conditional_headers(self, url: str, fingerprint: str) -> Dict[str, str]:
+        """Build If-None-Match/If-Modified-Since headers for a page cached with the same selectors"""
+        with self._lock:
+            entry = self._entry(url, fingerprint)
+        headers = {}
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def cached_links(self, url: str) -> List[Dict[str, str]]:
+        with self._lock:
+            return [dict(link) for link in self.pages.get(url, {}).get('pending_links', [])]
+
+    def cached_next_page(self, url: str) -> Optional[str]:
+        with self._lock:
+            return self.pages.get(url, {}).get('next_page')
+
+    def is_unchanged(self, url: str, content_hash: str, fingerprint: str) -> bool:
+        with self._lock:
+            entry = self._entry(url, fingerprint)
+            return entry is not None and entry.get('content_hash') == content_hash
+
+    def mark_skipped(self, url: str, reason: str, response: Optional[requests.Response] = None):
+        """Count a skipped page and refresh its validators"""
+        with self._lock:
+            self.stats[reason] += 1
+            metrics.incr(f'crawl.pages_{reason}')
+            entry = self.pages.get(url)
+            if entry is None:
+                return
+            entry['checked'] = datetime.now().isoformat()
+            if response is not None:
+                entry['etag'] = response.headers.get('ETag') or entry.get('etag')
+                entry['last_modified'] = response.headers.get('Last-Modified') or entry.get('last_modified')
+
+    def store(self, url: str, response: requests.Response, content_hash: str, fingerprint: str,
+              pending_links: List[Dict[str, str]], next_page: Optional[str] = None):
+        """Remember validators and unprocessed links of a freshly parsed page"""
+        with self._lock:
+            self.stats['fetched'] += 1
+            metrics.incr('crawl.pages_parsed')
+            self.pages[url] = {
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+                'content_hash': content_hash,
+                'fingerprint': fingerprint,
+                'pending_links': pending_links,
+                'next_page': next_page,
+                'checked': datetime.now().isoformat()
+            }
+
+    def skipped_count(self) -> int:
+        return self.stats['not_modified'] + self.stats['unchanged']
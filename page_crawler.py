@@ -0,0 +1,54 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, TypeVar
+from urllib.parse import urlparse
+
+import requests
+
+from config import AppConfig
+from http_client import create_session
+from rate_limiter import IntervalLimiter
+
+S = TypeVar('S')
+T = TypeVar('T')
+
+
+class PageCrawler:
+    """Fetches monitored pages concurrently over a shared keep-alive session.
+
+    Requests to the same host are limited to `crawl_per_host_limit` in flight
+    and their starts are spaced at least `crawl_request_interval` seconds apart.
+    """
+
+    def __init__(self, session: requests.Session = None, config: Optional[AppConfig] = None):
+        config = config or AppConfig()
+        self.max_workers = config.crawl_max_workers
+        self.per_host_limit = config.crawl_per_host_limit
+        self.request_interval = config.crawl_request_interval
+        self.session = session or create_session(pool_size=max(self.max_workers, self.per_host_limit))
+        self._lock = threading.Lock()
+        self._host_slots = {}
+        self._host_limiters = {}
+
+    def _host_slot(self, host: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            if host not in self._host_slots:
+                self._host_slots[host] = threading.BoundedSemaphore(self.per_host_limit)
+                self._host_limiters[host] = IntervalLimiter(self.request_interval)
+            return self._host_slots[host]
+
+    def fetch(self, url: str, **kwargs) -> requests.Response:
+        """GET a URL respecting the per-host concurrency limit and politeness rate"""
+        kwargs.setdefault('timeout', 30)
+        host = urlparse(url).netloc
+        with self._host_slot(host):
+            self._host_limiters[host].wait()
+            return self.session.get(url, **kwargs)
+
+    def crawl(self, items: List[S], handler: Callable[[S], T]) -> List[T]:
+        """Run handler for every URL or source concurrently, results are in input order"""
+        if not items:
+            return []
+        workers = max(1, min(self.max_workers, len(items)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(handler, items))
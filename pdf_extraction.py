@@ -0,0 +1,244 @@
+import hashlib
+import json
+import math
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import BinaryIO, List, Optional, Union
+
+from config import AppConfig
+from metrics import metrics
+from ocr import PageOcr
+
+# A PDF given as an open binary file or as a path on disk
+PdfSource = Union[BinaryIO, str]
+
+# PDFium is not thread-safe, every call into it within a process has to be serialized
+PDFIUM_LOCK = threading.Lock()
+
+
+class ExtractorBackend:
+    """Text extraction library wrapper working on a page range of a PDF file or path"""
+
+    name = ''
+    module = ''
+
+    @classmethod
+    def available(cls) -> bool:
+        try:
+            __import__(cls.module)
+            return True
+        except ImportError:
+            return False
+
+    def page_count(self, source: PdfSource) -> int:
+        raise NotImplementedError
+
+    def extract_pages(self, source: PdfSource, start: int, stop: int) -> List[str]:
+        raise NotImplementedError
+
+
+class PyPDF2Backend(ExtractorBackend):
+    name = 'pypdf2'
+    module = 'PyPDF2'
+
+    def page_count(self, source: PdfSource) -> int:
+        import PyPDF2
+        return len(PyPDF2.PdfReader(source).pages)
+
+    def extract_pages(self, source: PdfSource, start: int, stop: int) -> List[str]:
+        import PyPDF2
+        reader = PyPDF2.PdfReader(source)
+        return [reader.pages[index].extract_text() for index in range(start, stop)]
+
+
+class PdfiumBackend(ExtractorBackend):
+    name = 'pypdfium2'
+    module = 'pypdfium2'
+
+    def page_count(self, source: PdfSource) -> int:
+        import pypdfium2
+        with PDFIUM_LOCK:
+            document = pypdfium2.PdfDocument(source)
+            try:
+                return len(document)
+            finally:
+                document.close()
+
+    def extract_pages(self, source: PdfSource, start: int, stop: int) -> List[str]:
+        with PDFIUM_LOCK:
+            return self._extract_pages(source, start, stop)
+
+    def _extract_pages(self, source: PdfSource, start: int, stop: int) -> List[str]:
+        import pypdfium2
+        document = pypdfium2.PdfDocument(source)
+        try:
+            pages = []
+            for index in range(start, stop):
+                page = document[index]
+                text_page = page.get_textpage()
+                pages.append(text_page.get_text_range().replace('\r\n', '\n'))
+                text_page.close()
+                page.close()
+            return pages
+        finally:
+            document.close()
+
+
+class PdfMinerBackend(ExtractorBackend):
+    name = 'pdfminer'
+    module = 'pdfminer'
+
+    def page_count(self, source: PdfSource) -> int:
+        from pdfminer.pdfpage import PDFPage
+        if isinstance(source, str):
+            with open(source, 'rb') as f:
+                return sum(1 for _ in PDFPage.get_pages(f))
+        return sum(1 for _ in PDFPage.get_pages(source))
+
+    def extract_pages(self, source: PdfSource, start: int, stop: int) -> List[str]:
+        from pdfminer.high_level import extract_pages
+        from pdfminer.layout import LTTextContainer
+        return [
+            "".join(element.get_text() for element in page if isinstance(element, LTTextContainer))
+            for page in extract_pages(source, page_numbers=range(start, stop))
+        ]
+
+
+# Backends in order of preference when the configured backend is 'auto'.
+# pdfminer is slower than PyPDF2 and only used when selected explicitly.
+BACKENDS = {backend.name: backend for backend in (PdfiumBackend, PyPDF2Backend, PdfMinerBackend)}
+
+
+def select_backend(name: str = 'auto') -> ExtractorBackend:
+    """Return the requested backend, or the fastest installed one for 'auto'"""
+    if name != 'auto':
+        if name not in BACKENDS:
+            raise ValueError(f"Unknown PDF extractor '{name}', choose from: {', '.join(BACKENDS)}")
+        return BACKENDS[name]()
+    for backend in (PdfiumBackend, PyPDF2Backend):
+        if backend.available():
+            return backend()
+    return PyPDF2Backend()
+
+
+def _extract_range(backend_name: str, path: str, start: int, stop: int) -> List[str]:
+    """Process pool entry point"""
+    return BACKENDS[backend_name]().extract_pages(path, start, stop)
+
+
+class PdfTextExtractor:
+    """Extracts page texts of PDFs, splitting large documents across a process pool.
+
+    Page texts are cached on disk by document hash and backend, so a document
+    seen before is not parsed again. Pages without a text layer go through OCR.
+    The PDF is read from its file object and never held in memory as a whole;
+    worker processes get the path of a temporary copy on disk instead.
+    """
+
+    def __init__(self, config: Optional[AppConfig] = None):
+        config = config or AppConfig()
+        self.backend = select_backend(config.pdf_extractor)
+        self.processes = config.pdf_extract_processes or os.cpu_count() or 1
+        self.parallel_min_pages = config.pdf_parallel_min_pages
+        self.cache_dir = Path(config.extraction_cache_dir) if config.extraction_cache_dir else None
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self.cache_hits = 0
+        self.ocr = PageOcr(self.cache_dir / 'ocr' if self.cache_dir else None, config)
+
+    def extract_pages(self, pdf_file: BinaryIO) -> List[str]:
+        """Return the text of every page of a seekable PDF file object"""
+        spill_path = None
+        try:
+            document_hash = self._hash(pdf_file)
+            pages = self._load_cached(document_hash)
+            if pages is not None:
+                self.cache_hits += 1
+                metrics.incr('extract.cache_hits')
+            else:
+                pdf_file.seek(0)
+                page_count = self.backend.page_count(pdf_file)
+                if self.processes <= 1 or page_count < self.parallel_min_pages:
+                    pdf_file.seek(0)
+                    pages = self.backend.extract_pages(pdf_file, 0, page_count)
+                else:
+                    spill_path = self._spill(pdf_file)
+                    pages = self._extract_parallel(spill_path, page_count)
+                self._store_cached(document_hash, pages)
+
+            if self.ocr.needed(pages):
+                spill_path = spill_path or self._spill(pdf_file)
+                pages = self.ocr.fill_missing(spill_path, pages)
+            return pages
+        finally:
+            if spill_path is not None:
+                os.unlink(spill_path)
+
+    @staticmethod
+    def _hash(pdf_file: BinaryIO) -> str:
+        digest = hashlib.sha256()
+        pdf_file.seek(0)
+        for chunk in iter(lambda: pdf_file.read(1024 * 1024), b''):
+            digest.update(chunk)
+        return digest.hexdigest()
+
+    @staticmethod
+    def _spill(pdf_file: BinaryIO) -> str:
+        """Copy the PDF to a temporary file that worker processes can open by path"""
+        pdf_file.seek(0)
+        with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as f:
+            shutil.copyfileobj(pdf_file, f, 1024 * 1024)
+            return f.name
+
+    def _extract_parallel(self, path: str, page_count: int) -> List[str]:
+        batch = math.ceil(page_count / self.processes)
+        ranges = [(start, min(start + batch, page_count)) for start in range(0, page_count, batch)]
+        pool = self._get_pool()
+        futures = [pool.submit(_extract_range, self.backend.name, path, start, stop) for start, stop in ranges]
+        return [text for future in futures for text in future.result()]
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.processes,
+                                                 mp_context=multiprocessing.get_context('spawn'))
+            return self._pool
+
+    def _cache_file(self, document_hash: str) -> Optional[Path]:
+        if self.cache_dir is None:
+            return None
+        return self.cache_dir / self.backend.name / f"{document_hash}.json"
+
+    def _load_cached(self, document_hash: str) -> Optional[List[str]]:
+        cache_file = self._cache_file(document_hash)
+        if cache_file is None or not cache_file.exists():
+            return None
+        try:
+            with open(cache_file, 'r', encoding='utf-8') as f:
+                return json.load(f)['pages']
+        except Exception as e:
+            print(f"Error reading extraction cache {cache_file}: {e}")
+            return None
+
+    def _store_cached(self, document_hash: str, pages: List[str]):
+        cache_file = self._cache_file(document_hash)
+        if cache_file is None:
+            return
+        try:
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            with open(cache_file, 'w', encoding='utf-8') as f:
+                json.dump({'pages': pages}, f, ensure_ascii=False)
+        except Exception as e:
+            print(f"Error writing extraction cache {cache_file}: {e}")
+
+    def close(self):
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+        self.ocr.close()
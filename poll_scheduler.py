@@ -0,0 +1,110 @@
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from config import AppConfig
+
+DAY = 86400
+
+
+class PollScheduler:
+    """Adaptive polling intervals of monitored sources for the watch mode.
+
+    A source that just published something is polled every `min_interval`
+    seconds, each poll without news multiplies its interval by the backoff
+    factor up to `max_interval`. On weekdays when a source historically
+    publishes most of its documents (e.g. after council sessions) the interval
+    is capped at `hot_interval`. Sources can override the limits with
+    'min_interval' and 'max_interval' in URLS_TO_MONITOR.
+
+    All sources share a budget of `watch_daily_polls` polls a day, one sweep
+    over every source by default, so watching costs no more requests than the
+    former once-a-day run. The budget refills continuously; dormant sources
+    back off for days and leave their polls to the active ones, which go first
+    when the budget runs short.
+    """
+
+    def __init__(self, sources: List[Dict], discovery_history: Optional[Dict[str, List[str]]] = None,
+                 config: Optional[AppConfig] = None):
+        config = config or AppConfig()
+        self.backoff = config.watch_backoff
+        self.hot_interval = config.watch_hot_interval
+        self.sources = {}
+        self.daily_budget = config.watch_daily_polls or len(sources) or 1
+        self.tokens = float(self.daily_budget)
+        now = time.monotonic()
+        self.refilled_at = now
+        for source in sources:
+            min_interval = float(source.get('min_interval', config.watch_min_interval))
+            max_interval = float(source.get('max_interval', config.watch_max_interval))
+            self.sources[source['url']] = {
+                'source': source,
+                'min_interval': min_interval,
+                'max_interval': max_interval,
+                # Start at the cadence of the former daily run
+                'interval': min(max(float(DAY), min_interval), max_interval),
+                'next_poll': now,
+                'hot_weekdays': self.hot_weekdays((discovery_history or {}).get(source['title'], []))
+            }
+
+    @staticmethod
+    def hot_weekdays(discovered_at: List[str], min_samples: int = 5, min_share: float = 2 / 7) -> set:
+        """Weekdays on which at least `min_share` of the source's documents were discovered.
+
+        The default is twice the share of an evenly publishing source, so only a
+        clear weekly peak counts and sources publishing on any workday have none.
+        """
+        weekdays = Counter()
+        for timestamp in discovered_at:
+            try:
+                weekdays[datetime.fromisoformat(timestamp).weekday()] += 1
+            except (TypeError, ValueError):
+                continue
+        total = sum(weekdays.values())
+        if total < min_samples:
+            return set()
+        return {day for day, count in weekdays.items() if count / total >= min_share}
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(float(self.daily_budget),
+                          self.tokens + (now - self.refilled_at) * self.daily_budget / DAY)
+        self.refilled_at = now
+
+    def _priority(self, state: Dict):
+        """Sort key of due sources, hot today first, then the most recently active"""
+        return datetime.now().weekday() not in state['hot_weekdays'], state['interval'], state['next_poll']
+
+    def due_sources(self) -> List[Dict]:
+        """Sources due for a poll, as many as the remaining budget allows"""
+        self._refill()
+        now = time.monotonic()
+        due = sorted((state for state in self.sources.values() if state['next_poll'] <= now), key=self._priority)
+        return [state['source'] for state in due[:int(self.tokens)]]
+
+    def seconds_until_next_poll(self) -> float:
+        if not self.sources:
+            return float(self.hot_interval)
+        self._refill()
+        wait = min(state['next_poll'] for state in self.sources.values()) - time.monotonic()
+        if self.tokens < 1:
+            wait = max(wait, (1 - self.tokens) * DAY / self.daily_budget)
+        return max(0.0, wait)
+
+    def record_poll(self, url: str, new_documents: int):
+        """Shorten the interval of a source that had news, lengthen it otherwise"""
+        state = self.sources[url]
+        self._refill()
+        self.tokens -= 1
+        if new_documents:
+            state['interval'] = state['min_interval']
+        else:
+            state['interval'] = min(state['interval'] * self.backoff, state['max_interval'])
+        interval = state['interval']
+        if datetime.now().weekday() in state['hot_weekdays']:
+            interval = min(interval, max(self.hot_interval, state['min_interval']))
+        state['next_poll'] = time.monotonic() + interval
+
+    def intervals(self) -> Dict[str, float]:
+        return {url: state['next_poll'] - time.monotonic() for url, state in self.sources.items()}
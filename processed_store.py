@@ -0,0 +1,352 @@
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    url TEXT PRIMARY KEY,
+    content_hash TEXT,
+    title TEXT,
+    source_title TEXT,
+    source_page TEXT,
+    discovered_at TEXT,
+    processed_at TEXT NOT NULL,
+    summary TEXT
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS documents_content_hash ON documents (content_hash);
+CREATE TABLE IF NOT EXISTS outbox (
+    url TEXT NOT NULL,
+    channel TEXT NOT NULL,
+    state TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    updated_at TEXT NOT NULL,
+    sequence INTEGER,
+    UNIQUE (url, channel)
+);
+CREATE INDEX IF NOT EXISTS outbox_state ON outbox (state);
+CREATE TABLE IF NOT EXISTS signatures (
+    url TEXT PRIMARY KEY,
+    content_hash TEXT NOT NULL,
+    minhash BLOB NOT NULL,
+    text BLOB,
+    created_at TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS signatures_content_hash ON signatures (content_hash);
+CREATE TABLE IF NOT EXISTS signature_bands (
+    band INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,
+    url TEXT NOT NULL,
+    PRIMARY KEY (band, bucket, url)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# Full texts live in a separate database attached as 'texts', so the main
+# database stays small enough to be committed after every run
+TEXTS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS texts.document_texts (
+    url TEXT PRIMARY KEY,
+    text BLOB NOT NULL,
+    created_at TEXT NOT NULL
+) WITHOUT ROWID;
+"""
+
+DOCUMENT_FIELDS = ('url', 'content_hash', 'title', 'source_title', 'source_page',
+                   'discovered_at', 'processed_at', 'summary', 'duplicate_of')
+
+PENDING = 'pending'
+DELIVERED = 'delivered'
+FAILED = 'failed'
+# The delivery may or may not have happened, an operator has to resolve it
+UNCONFIRMED = 'unconfirmed'
+
+
+class ProcessedDocumentStore:
+    """SQLite store of processed documents.
+
+    Membership checks are indexed lookups and new documents are inserted
+    row by row, so neither startup nor saving depends on the history size.
+    On first use the URLs from the legacy processed_pdfs.json are imported.
+
+    The outbox table holds one row per document and publishing channel, so
+    deliveries interrupted by a crash or an outage are resumed by later runs
+    without summarizing the document again.
+
+    The signature tables back the duplicate detection in dedup.py. The
+    compressed texts kept for diffing revisions are stored in `texts_file`,
+    by default document_texts.db next to the main database.
+    """
+
+    def __init__(self, db_file: str = "processed_documents.db", legacy_json: Optional[str] = None,
+                 texts_file: Optional[str] = None):
+        self.db_file = db_file
+        self.texts_file = texts_file or str(Path(db_file).with_name("document_texts.db"))
+        self._lock = threading.Lock()
+        self.connection = sqlite3.connect(db_file, check_same_thread=False)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("ATTACH DATABASE ? AS texts", (self.texts_file,))
+        with self.connection:
+            self.connection.executescript(SCHEMA + TEXTS_SCHEMA)
+            self._add_missing_columns()
+        self._move_texts()
+        if legacy_json:
+            self.migrate_from_json(legacy_json)
+
+    def _add_missing_columns(self):
+        """Upgrade databases created before a column was added"""
+        existing = {row['name'] for row in self.connection.execute("PRAGMA table_info(documents)")}
+        for field in DOCUMENT_FIELDS:
+            if field not in existing:
+                self.connection.execute(f"ALTER TABLE documents ADD COLUMN {field} TEXT")
+        existing = {row['name'] for row in self.connection.execute("PRAGMA table_info(outbox)")}
+        if 'sequence' not in existing:
+            self.connection.execute("ALTER TABLE outbox ADD COLUMN sequence INTEGER")
+
+    def _move_texts(self):
+        """Move texts stored in the main database by earlier versions to the texts database"""
+        with self.connection:
+            moved = self.connection.execute(
+                "INSERT OR IGNORE INTO texts.document_texts (url, text, created_at) "
+                "SELECT url, text, created_at FROM signatures WHERE text IS NOT NULL"
+            ).rowcount
+            self.connection.execute("UPDATE signatures SET text = NULL WHERE text IS NOT NULL")
+        if moved > 0:
+            self.connection.execute("VACUUM main")
+            print(f"Moved {moved} stored texts to {self.texts_file}")
+
+    def migrate_from_json(self, json_file: str):
+        """One-time import of processed URLs from the legacy JSON tracking file"""
+        with self._lock:
+            if self.connection.execute("SELECT 1 FROM meta WHERE key = 'migrated_from_json'").fetchone():
+                return
+            if not Path(json_file).exists():
+                return
+            try:
+                with open(json_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except Exception as e:
+                print(f"Error loading tracking file for migration: {e}")
+                return
+            processed_at = data.get('last_updated') or datetime.now().isoformat()
+            urls = data.get('processed_pdfs', [])
+            with self.connection:
+                self.connection.executemany(
+                    "INSERT OR IGNORE INTO documents (url, processed_at) VALUES (?, ?)",
+                    [(url, processed_at) for url in urls]
+                )
+                self.connection.execute(
+                    "INSERT INTO meta (key, value) VALUES ('migrated_from_json', ?)",
+                    (datetime.now().isoformat(),)
+                )
+            print(f"Migrated {len(urls)} processed PDFs from {json_file}")
+
+    def __contains__(self, url: str) -> bool:
+        with self._lock:
+            return self.connection.execute("SELECT 1 FROM documents WHERE url = ?", (url,)).fetchone() is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self.connection.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def add(self, pdf_info: Dict[str, str]):
+        """Record a processed document"""
+        self.add_many([pdf_info])
+
+    def add_many(self, documents: Iterable[Dict[str, str]]):
+        """Record processed documents in a single transaction"""
+        with self._lock, self.connection:
+            self._insert_documents(documents)
+
+    def add_with_outbox(self, pdf_info: Dict[str, str], channels: Iterable[str]):
+        """Record a processed document and queue its delivery to channels in one transaction.
+
+        The document's 'sequence', its position in the listing order of the run,
+        keeps deliveries in that order even though documents finish out of order.
+        """
+        now = datetime.now().isoformat()
+        with self._lock, self.connection:
+            self._insert_documents([pdf_info])
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO outbox (url, channel, state, updated_at, sequence) VALUES (?, ?, ?, ?, ?)",
+                [(pdf_info['url'], channel, PENDING, now, pdf_info.get('sequence')) for channel in channels]
+            )
+
+    def _insert_documents(self, documents: Iterable[Dict[str, str]]):
+        now = datetime.now().isoformat()
+        rows = [tuple(now if field == 'processed_at' else doc.get(field) for field in DOCUMENT_FIELDS)
+                for doc in documents]
+        self.connection.executemany(
+            f"INSERT OR REPLACE INTO documents ({', '.join(DOCUMENT_FIELDS)}) "
+            f"VALUES ({', '.join('?' for _ in DOCUMENT_FIELDS)})",
+            rows
+        )
+
+    def pending_deliveries(self) -> Dict[str, List[Dict[str, str]]]:
+        """Return undelivered documents per channel, by run and listing order within a run"""
+        with self._lock:
+            rows = self.connection.execute(
+                "SELECT outbox.channel, documents.* FROM outbox "
+                "JOIN documents ON documents.url = outbox.url "
+                "WHERE outbox.state = ? "
+                "ORDER BY documents.discovered_at, outbox.sequence, outbox.rowid", (PENDING,)
+            ).fetchall()
+        pending = {}
+        for row in rows:
+            document = dict(row)
+            pending.setdefault(document.pop('channel'), []).append(document)
+        return pending
+
+    def mark_delivery(self, url: str, channel: str, delivered: bool, error: str = None, max_attempts: int = 0):
+        """Record the outcome of a delivery attempt.
+
+        Undelivered rows stay pending until they have failed max_attempts times.
+        """
+        now = datetime.now().isoformat()
+        with self._lock, self.connection:
+            if delivered:
+                self.connection.execute(
+                    "UPDATE outbox SET state = ?, attempts = attempts + 1, last_error = NULL, updated_at = ? "
+                    "WHERE url = ? AND channel = ?", (DELIVERED, now, url, channel)
+                )
+            else:
+                self.connection.execute(
+                    "UPDATE outbox SET attempts = attempts + 1, last_error = ?, updated_at = ?, "
+                    "state = CASE WHEN ? > 0 AND attempts + 1 >= ? THEN ? ELSE state END "
+                    "WHERE url = ? AND channel = ?",
+                    (error, now, max_attempts, max_attempts, FAILED, url, channel)
+                )
+
+    def mark_unconfirmed(self, url: str, channel: str, error: str = None):
+        """Take a delivery whose outcome is unknown out of the pending ones, so it is not sent twice"""
+        now = datetime.now().isoformat()
+        with self._lock, self.connection:
+            self.connection.execute(
+                "UPDATE outbox SET state = ?, attempts = attempts + 1, last_error = ?, updated_at = ? "
+                "WHERE url = ? AND channel = ?", (UNCONFIRMED, error, now, url, channel)
+            )
+
+    def unconfirmed_deliveries(self) -> List[Dict[str, str]]:
+        with self._lock:
+            rows = self.connection.execute(
+                "SELECT url, channel, last_error, updated_at FROM outbox WHERE state = ? ORDER BY rowid",
+                (UNCONFIRMED,)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def resolve_unconfirmed(self, delivered: bool) -> int:
+        """Mark all unconfirmed deliveries as delivered, or queue them again, returns their number"""
+        now = datetime.now().isoformat()
+        with self._lock, self.connection:
+            return self.connection.execute(
+                "UPDATE outbox SET state = ?, updated_at = ? WHERE state = ?",
+                (DELIVERED if delivered else PENDING, now, UNCONFIRMED)
+            ).rowcount
+
+    def deliveries(self, url: str) -> Dict[str, str]:
+        """Return delivery state per channel of a document"""
+        with self._lock:
+            rows = self.connection.execute("SELECT channel, state FROM outbox WHERE url = ?", (url,)).fetchall()
+        return {row['channel']: row['state'] for row in rows}
+
+    def get(self, url: str) -> Optional[Dict[str, str]]:
+        with self._lock:
+            row = self.connection.execute("SELECT * FROM documents WHERE url = ?", (url,)).fetchone()
+        return dict(row) if row else None
+
+    def find_by_content_hash(self, content_hash: str) -> List[Dict[str, str]]:
+        """Return earlier documents with the same content"""
+        with self._lock:
+            rows = self.connection.execute(
+                "SELECT * FROM documents WHERE content_hash = ? ORDER BY processed_at", (content_hash,)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def add_signature(self, url: str, content_hash: str, minhash: bytes, buckets: List[int],
+                      text: Optional[bytes] = None):
+        """Index the MinHash signature and LSH band buckets of a document"""
+        with self._lock, self.connection:
+            now = datetime.now().isoformat()
+            self.connection.execute(
+                "INSERT OR REPLACE INTO signatures (url, content_hash, minhash, created_at) "
+                "VALUES (?, ?, ?, ?)", (url, content_hash, minhash, now)
+            )
+            if text is not None:
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO texts.document_texts (url, text, created_at) VALUES (?, ?, ?)",
+                    (url, text, now)
+                )
+            self.connection.execute("DELETE FROM signature_bands WHERE url = ?", (url,))
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO signature_bands (band, bucket, url) VALUES (?, ?, ?)",
+                [(band, bucket, url) for band, bucket in enumerate(buckets)]
+            )
+
+    def find_signatures_by_hash(self, content_hash: str) -> List[str]:
+        """Return URLs of indexed documents with exactly the same text"""
+        with self._lock:
+            rows = self.connection.execute(
+                "SELECT url FROM signatures WHERE content_hash = ? ORDER BY created_at", (content_hash,)
+            ).fetchall()
+        return [row['url'] for row in rows]
+
+    def signature_candidates(self, buckets: List[int]) -> Dict[str, bytes]:
+        """Return signatures of documents sharing at least one LSH band bucket"""
+        if not buckets:
+            return {}
+        condition = " OR ".join("(band = ? AND bucket = ?)" for _ in buckets)
+        params = [value for band, bucket in enumerate(buckets) for value in (band, bucket)]
+        with self._lock:
+            rows = self.connection.execute(
+                f"SELECT DISTINCT signatures.url, signatures.minhash FROM signature_bands "
+                f"JOIN signatures ON signatures.url = signature_bands.url WHERE {condition}", params
+            ).fetchall()
+        return {row['url']: row['minhash'] for row in rows}
+
+    def signature_text(self, url: str) -> Optional[bytes]:
+        with self._lock:
+            row = self.connection.execute("SELECT text FROM texts.document_texts WHERE url = ?",
+                                          (url,)).fetchone()
+        return row['text'] if row else None
+
+    def prune_signature_texts(self, older_than: str) -> int:
+        """Drop stored texts of documents indexed before a timestamp, their signatures stay"""
+        with self._lock, self.connection:
+            return self.connection.execute(
+                "DELETE FROM texts.document_texts WHERE created_at < ?", (older_than,)
+            ).rowcount
+
+    def discovery_history(self) -> Dict[str, List[str]]:
+        """Return discovery times of all documents per source title"""
+        with self._lock:
+            rows = self.connection.execute(
+                "SELECT source_title, discovered_at FROM documents "
+                "WHERE source_title IS NOT NULL AND discovered_at IS NOT NULL"
+            ).fetchall()
+        history = {}
+        for row in rows:
+            history.setdefault(row['source_title'], []).append(row['discovered_at'])
+        return history
+
+    def all_documents(self) -> List[Dict[str, str]]:
+        """Return all processed documents, oldest first"""
+        with self._lock:
+            rows = self.connection.execute("SELECT * FROM documents ORDER BY processed_at").fetchall()
+        return [dict(row) for row in rows]
+
+    def recent(self, limit: int = 20) -> List[Dict[str, str]]:
+        """Return the most recently processed documents"""
+        with self._lock:
+            rows = self.connection.execute(
+                "SELECT * FROM documents ORDER BY processed_at DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def close(self):
+        self.connection.close()
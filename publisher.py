@@ -0,0 +1,153 @@
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+import requests
+from urllib3.exceptions import NewConnectionError
+
+from config import AppConfig
+from metrics import metrics
+
+DELIVERED = 'delivered'
+FAILED = 'failed'
+TIMEOUT = 'timeout'
+# The batch request failed after it may have reached the API, the outcome is unknown
+UNCONFIRMED = 'unconfirmed'
+
+ResultCallback = Optional[Callable[[str, Dict[str, str], str, Optional[str]], None]]
+# Delivers a list of documents, returns None or the error for each of them
+BatchSink = Callable[[List[Dict[str, str]]], List[Optional[Exception]]]
+
+
+class RateLimitedError(Exception):
+    """Raised by a sink when the remote API asks us to slow down"""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def retry_after_from_response(response: requests.Response, default: float = 0) -> Optional[float]:
+    """Read the requested delay from a rate-limited response, None if it was not rate limited"""
+    try:
+        body = response.json()
+    except ValueError:
+        body = {}
+    retry_after = (body.get('parameters') or {}).get('retry_after') if isinstance(body, dict) else None
+    if retry_after is None and response.headers.get('Retry-After', '').isdigit():
+        retry_after = int(response.headers['Retry-After'])
+    if response.status_code == 429 or retry_after is not None:
+        return float(retry_after if retry_after is not None else default)
+    return None
+
+
+def never_sent(error: Exception) -> bool:
+    """True when a request failed before any of it reached the server"""
+    if isinstance(error, (RateLimitedError, requests.ConnectTimeout)):
+        return True
+    # A dropped connection may have been processed, only a connection that was never made is safe
+    reason = getattr(error.args[0], 'reason', None) if error.args else None
+    return isinstance(error, requests.ConnectionError) and isinstance(reason, NewConnectionError)
+
+
+class PublishDispatcher:
+    """Delivers documents to all publishing sinks concurrently.
+
+    Each sink receives its documents one by one and in order. Failed
+    deliveries are retried with exponential backoff, rate limits wait for the
+    delay requested by the API, and every sink has its own time budget so a
+    slow channel does not hold up the others.
+
+    A sink with a batch function first gets all its documents in one call;
+    only the documents the batch failed to deliver go one by one. When the
+    batch request fails after it may have reached the API (e.g. a read
+    timeout), its documents are reported UNCONFIRMED instead of being sent
+    again, and the caller keeps them apart until an operator resolves them.
+    """
+
+    def __init__(self, sinks: Dict[str, Callable[[Dict[str, str]], None]],
+                 batch_sinks: Optional[Dict[str, BatchSink]] = None,
+                 config: Optional[AppConfig] = None):
+        config = config or AppConfig()
+        self.sinks = sinks
+        self.batch_sinks = batch_sinks or {}
+        self.sink_timeout = config.publish_sink_timeout
+        self.max_retries = config.publish_max_retries
+        self.retry_backoff = config.publish_retry_backoff
+
+    def publish(self, documents_by_sink: Dict[str, List[Dict[str, str]]],
+                on_result: ResultCallback = None) -> Dict[str, Dict[str, str]]:
+        """Deliver documents to their sinks, returns delivery status per sink and document URL.
+
+        on_result(sink, document, status, error) is called right after every delivery.
+        """
+        work = {name: docs for name, docs in documents_by_sink.items() if docs and name in self.sinks}
+        if not work:
+            return {}
+
+        with ThreadPoolExecutor(max_workers=len(work), thread_name_prefix='publish') as executor:
+            futures = {name: executor.submit(self._run_sink, name, self.sinks[name], docs, on_result)
+                       for name, docs in work.items()}
+            return {name: future.result() for name, future in futures.items()}
+
+    def _run_sink(self, name: str, sink: Callable[[Dict[str, str]], None],
+                  documents: List[Dict[str, str]], on_result: ResultCallback) -> Dict[str, str]:
+        deadline = time.monotonic() + self.sink_timeout
+        batched = self._deliver_batch(name, documents) if name in self.batch_sinks else {}
+        results = {}
+        for doc in documents:
+            if doc['url'] in batched:
+                status, error = batched[doc['url']]
+            elif time.monotonic() >= deadline:
+                print(f"{name}: time budget exhausted, skipping {doc['url']}")
+                status, error = TIMEOUT, "time budget exhausted"
+            else:
+                with metrics.timer(f'publish.{name}'):
+                    status, error = self._deliver(name, sink, doc, deadline)
+            metrics.incr(f'publish.{name}.{status}')
+            results[doc['url']] = status
+            if on_result is not None:
+                on_result(name, doc, status, error)
+        delivered = sum(1 for status in results.values() if status == DELIVERED)
+        print(f"{name}: delivered {delivered} of {len(documents)} documents")
+        return results
+
+    def _deliver_batch(self, name: str, documents: List[Dict[str, str]]) -> Dict[str, Tuple[str, Optional[str]]]:
+        """Send all documents in one batch, returns status and error per URL settled by the batch.
+
+        Documents the batch definitely did not deliver are left out, they go one by one.
+        """
+        try:
+            with metrics.timer(f'publish.{name}.batch'):
+                errors = self.batch_sinks[name](documents)
+        except Exception as e:
+            if never_sent(e):
+                print(f"{name}: batch delivery failed, sending documents one by one: {e}")
+                return {}
+            print(f"{name}: batch delivery outcome unknown, not resending: {e}")
+            return {doc['url']: (UNCONFIRMED, str(e)) for doc in documents}
+        return {doc['url']: (DELIVERED, None) for doc, error in zip(documents, errors) if error is None}
+
+    def _deliver(self, name: str, sink: Callable[[Dict[str, str]], None],
+                 doc: Dict[str, str], deadline: float) -> Tuple[str, Optional[str]]:
+        for attempt in range(self.max_retries + 1):
+            try:
+                sink(doc)
+                return DELIVERED, None
+            except RateLimitedError as e:
+                error = str(e)
+                delay = e.retry_after
+                print(f"{name}: rate limited, retrying in {delay:.1f} s")
+            except Exception as e:
+                error = str(e)
+                delay = self.retry_backoff * 2 ** attempt * random.uniform(0.8, 1.2)
+                print(f"{name}: error delivering {doc['url']} (attempt {attempt + 1}): {e}")
+
+            if attempt == self.max_retries:
+                return FAILED, error
+            if time.monotonic() + delay >= deadline:
+                return TIMEOUT, error
+            metrics.incr(f'publish.{name}.retries')
+            time.sleep(delay)
+        return FAILED, None
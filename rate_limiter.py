@@ -0,0 +1,20 @@
+import threading
+import time
+
+
+class IntervalLimiter:
+    """Spaces out calls so that consecutive starts are at least `interval` seconds apart"""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._next_start = 0.0
+
+    def wait(self):
+        """Block until the next call is allowed to start"""
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start)
+            self._next_start = start + self.interval
+        if start > now:
+            time.sleep(start - now)
@@ -17,15 +17,15 @@ GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")    # GitHub personal access token with
 GITHUB_REPO = "vojtan/summarizationtool"               # Format: owner/repo
 SECRET_NAME = "FB_USER_TOKEN"               # Name of the secret in GitHub
 
-def refresh_fb_token(app_id, app_secret, user_token):
-    url = "https://graph.facebook.com/v23.0/oauth/access_token"
+def refresh_fb_token(app_id, app_secret, user_token, graph_url="https://graph.facebook.com/v23.0"):
+    url = f"{graph_url}/oauth/access_token"
     params = {
         "grant_type": "fb_exchange_token",
         "client_id": app_id,
         "client_secret": app_secret,
         "fb_exchange_token": user_token
     }
-    resp = requests.get(url, params=params)
+    resp = requests.get(url, params=params, timeout=30)
     resp.raise_for_status()
     data = resp.json()
     return data["access_token"]
@@ -1,41 +1,117 @@
+import json
+import xml.etree.ElementTree as ET
 from datetime import datetime
-from bs4 import BeautifulSoup
 from pathlib import Path
+from typing import Dict, List, Optional
+from xml.sax.saxutils import escape
+
+from config import AppConfig
+
+FEED_HEADER = '<?xml version="1.0" encoding="utf-8"?>\n<rss version="2.0">\n<channel>'
+FEED_FOOTER = '</channel>\n</rss>\n'
+ITEM_FIELDS = ('title', 'link', 'pubDate', 'description')
+
 
 class RssFeedUpdater:
-    def __init__(self):
+    """Keeps the RSS feed as a structured item store and renders it from a template.
+
+    Only the `rss_max_items` newest items are published. Older items are
+    moved to one archive feed per month and dropped from the store, so an
+    update never has to parse or rewrite the growing history.
+    """
+
+    def __init__(self, config: Optional[AppConfig] = None):
+        config = config or AppConfig()
         self.feed_file = "rss_feed.xml"
-    def update_feed(self, all_new_pdfs):        
+        self.items_file = "rss_items.json"
+        self.archive_dir = "rss_archive"
+        self.max_items = config.rss_max_items
+
+    def update_feed(self, all_new_pdfs):
         """Add new PDF items to the RSS feed"""
         if not all_new_pdfs:
             return
-        
-        # Load existing RSS feed
-        if Path(self.feed_file).exists():
-            with open(self.feed_file, 'r', encoding='utf-8') as f:
-                rss_content = f.read()
-        
-        soup = BeautifulSoup(rss_content, 'xml')
-        channel = soup.find('channel')
-
-        for pdf in all_new_pdfs:
-            item = soup.new_tag('item')
-            title = soup.new_tag('title')
-            title.string = pdf['source_title']
-            link = soup.new_tag('link')
-            link.string = pdf['url']
-            description = soup.new_tag('description')
-            description.string = pdf['summary']
-            pub_date = soup.new_tag('pubDate')
-            pub_date.string = datetime.now().strftime('%a, %d %b %Y %H:%M:%S +0000')
-
-            item.append(title)
-            item.append(link)
-            item.append(pub_date)
-            item.append(description)
-            channel.insert(0, item)
-
-        # Save updated RSS feed
-        with open(self.feed_file, 'w', encoding='utf-8') as f:
-            f.write(str(soup))
-        
+
+        store = self.load_items()
+        pub_date = datetime.now().strftime('%a, %d %b %Y %H:%M:%S +0000')
+        new_items = [{
+            'title': pdf['source_title'],
+            'link': pdf['url'],
+            'pubDate': pub_date,
+            'description': pdf['summary']
+        } for pdf in reversed(all_new_pdfs)]
+
+        items = new_items + store['items']
+        store['items'] = items[:self.max_items]
+        if len(items) > self.max_items:
+            self.write_archive(store['channel'], items[self.max_items:])
+
+        self.save_items(store)
+        self.write_feed(self.feed_file, store['channel'], store['items'])
+
+    def add_item(self, pdf):
+        """Add a single PDF item to the RSS feed"""
+        self.update_feed([pdf])
+
+    def add_items(self, pdfs) -> List[None]:
+        """Add PDF items to the RSS feed in one update, batch sink of the publisher"""
+        self.update_feed(pdfs)
+        return [None] * len(pdfs)
+
+    def load_items(self) -> Dict:
+        """Load the item store, importing it from the existing feed on first use"""
+        if Path(self.items_file).exists():
+            with open(self.items_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        return self.import_feed()
+
+    def save_items(self, store: Dict):
+        with open(self.items_file, 'w', encoding='utf-8') as f:
+            json.dump(store, f, ensure_ascii=False, indent=1)
+
+    def import_feed(self) -> Dict:
+        """Read channel info and items from the existing feed file"""
+        store = {'channel': {'title': 'Novinky z komisí a výborů z Děčína', 'link': 'http://www.mmdecin.cz'},
+                 'items': []}
+        if not Path(self.feed_file).exists():
+            return store
+
+        channel = ET.parse(self.feed_file).getroot().find('channel')
+        if channel is None:
+            return store
+        for field in ('title', 'link'):
+            if channel.findtext(field):
+                store['channel'][field] = channel.findtext(field)
+        store['items'] = self.read_items(channel)
+        return store
+
+    @staticmethod
+    def read_items(channel: ET.Element) -> List[Dict[str, str]]:
+        return [{field: item.findtext(field) or '' for field in ITEM_FIELDS} for item in channel.findall('item')]
+
+    def write_archive(self, channel: Dict[str, str], items: List[Dict[str, str]]):
+        """Add items dropped from the published feed to the archive feed of the current month"""
+        Path(self.archive_dir).mkdir(exist_ok=True)
+        archive_file = Path(self.archive_dir) / f"rss_feed_{datetime.now().strftime('%Y-%m')}.xml"
+        archived = []
+        if archive_file.exists():
+            archive_channel = ET.parse(archive_file).getroot().find('channel')
+            if archive_channel is not None:
+                archived = self.read_items(archive_channel)
+        # Newest first like the published feed, items dropped now are newer than the archived ones
+        self.write_feed(str(archive_file), channel, items + archived)
+        print(f"Archived {len(items)} RSS items to {archive_file}")
+
+    def write_feed(self, feed_file: str, channel: Dict[str, str], items: List[Dict[str, str]]):
+        parts = [FEED_HEADER,
+                 f"<title>{escape(channel['title'])}</title>",
+                 f"<link>{escape(channel['link'])}</link>",
+                 "<description/>"]
+        for item in items:
+            parts.append("<item>" + "".join(
+                f"<{field}>{escape(item[field])}</{field}>" for field in ITEM_FIELDS
+            ) + "</item>")
+        parts.append(FEED_FOOTER)
+
+        with open(feed_file, 'w', encoding='utf-8') as f:
+            f.write("\n".join(parts))
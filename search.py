@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Full-text search over processed documents and their summaries.
+
+Examples:
+  python search.py "Křešice MŠ"
+  python search.py kresice --prefix --source usneseni --since 2023-01-01
+  python search.py 'NEAR("rozpočet" "změna", 5)' --raw --json
+"""
+
+import argparse
+import json
+import sqlite3
+from pathlib import Path
+
+from search_index import SearchIndex
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('query', help='words that must all appear, diacritics and case are ignored')
+    parser.add_argument('--index', default='search_index.db', help='search index database')
+    parser.add_argument('--limit', type=int, default=20, help='maximum number of results')
+    parser.add_argument('--source', help='only documents whose source title contains these words')
+    parser.add_argument('--since', help='only documents published on or after this ISO date')
+    parser.add_argument('--until', help='only documents published before this ISO date')
+    parser.add_argument('--prefix', action='store_true', help='match words by prefix, e.g. inflected forms')
+    parser.add_argument('--raw', action='store_true', help='pass the query to SQLite FTS5 unchanged')
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if not Path(args.index).exists():
+        print(f"Search index {args.index} does not exist")
+        return 1
+
+    index = SearchIndex(args.index)
+    try:
+        results = index.search(args.query, limit=args.limit, source=args.source, since=args.since,
+                               until=args.until, prefix=args.prefix, raw=args.raw)
+    except sqlite3.OperationalError as e:
+        print(f"Invalid query: {e}")
+        return 1
+    finally:
+        index.close()
+
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+        return 0
+    for result in results:
+        print(f"{result['published'][:10]}  {result['source_title'] or ''}: {result['title'] or ''}")
+        print(f"  {result['url']}")
+        print(f"  {' '.join(result['snippet'].split())}")
+    print(f"{len(results)} results")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,127 @@
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional
+
+SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(
+    url UNINDEXED,
+    title,
+    source_title,
+    summary,
+    text,
+    published UNINDEXED,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# bm25 weights of the columns above, matches in titles rank highest
+COLUMN_WEIGHTS = (0.0, 5.0, 2.0, 2.0, 1.0, 0.0)
+
+
+def build_match_query(query: str, prefix: bool = False) -> str:
+    """Turn free text into an FTS5 query requiring every term, quoted so punctuation is literal"""
+    terms = [term.replace('"', '""') for term in query.split()]
+    return " ".join(f'"{term}"' + ('*' if prefix else '') for term in terms)
+
+
+class SearchIndex:
+    """SQLite FTS5 index of extracted texts and summaries of processed documents.
+
+    Diacritics are folded, so 'Kresice' finds 'Křešice'. Documents are added
+    one by one as they are processed; re-adding a URL replaces its entry.
+    """
+
+    def __init__(self, db_file: str = "search_index.db"):
+        self.db_file = db_file
+        self._lock = threading.Lock()
+        self.connection = sqlite3.connect(db_file, check_same_thread=False)
+        self.connection.row_factory = sqlite3.Row
+        with self.connection:
+            self.connection.executescript(SCHEMA)
+
+    def add(self, pdf_info: Dict[str, str], text: Optional[str] = None):
+        """Index or re-index a document"""
+        self.add_many([pdf_info], [text])
+
+    def add_many(self, documents: Iterable[Dict[str, str]], texts: Optional[Iterable[Optional[str]]] = None):
+        documents = list(documents)
+        texts = list(texts) if texts is not None else [None] * len(documents)
+        rows = [(doc['url'], doc.get('title'), doc.get('source_title'), doc.get('summary'), text,
+                 doc.get('discovered_at') or doc.get('processed_at') or datetime.now().isoformat())
+                for doc, text in zip(documents, texts)]
+        with self._lock, self.connection:
+            for row in rows:
+                # Stable rowid per URL so replacing an entry is an indexed delete
+                self.connection.execute("INSERT OR IGNORE INTO entries (url) VALUES (?)", (row[0],))
+                rowid = self.connection.execute("SELECT id FROM entries WHERE url = ?", (row[0],)).fetchone()[0]
+                self.connection.execute("DELETE FROM documents_fts WHERE rowid = ?", (rowid,))
+                self.connection.execute(
+                    "INSERT INTO documents_fts (rowid, url, title, source_title, summary, text, published) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)", (rowid,) + row
+                )
+
+    def backfill(self, load_documents: Callable[[], Iterable[Dict[str, str]]]):
+        """One-time import of summaries of documents processed before the index existed.
+
+        load_documents is only called when the import has not run yet.
+        """
+        with self._lock:
+            if self.connection.execute("SELECT 1 FROM meta WHERE key = 'backfilled'").fetchone():
+                return
+        documents = [doc for doc in load_documents() if doc.get('summary')]
+        self.add_many(documents)
+        with self._lock, self.connection:
+            self.connection.execute("INSERT INTO meta (key, value) VALUES ('backfilled', ?)",
+                                    (datetime.now().isoformat(),))
+        print(f"Indexed summaries of {len(documents)} earlier documents")
+
+    def search(self, query: str, limit: int = 20, source: Optional[str] = None,
+               since: Optional[str] = None, until: Optional[str] = None,
+               prefix: bool = False, raw: bool = False) -> List[Dict[str, str]]:
+        """Find documents matching all terms of a query, best matches first.
+
+        `source` filters by words of the source title, `since` and `until` by
+        ISO dates. With `raw` the query is passed to FTS5 unchanged.
+        """
+        match = query if raw else build_match_query(query, prefix)
+        if source:
+            match = f"({match}) AND source_title : ({build_match_query(source)})"
+        conditions = ["documents_fts MATCH ?"]
+        params = [match]
+        if since:
+            conditions.append("published >= ?")
+            params.append(since)
+        if until:
+            conditions.append("published < ?")
+            params.append(until)
+        weights = ", ".join(str(weight) for weight in COLUMN_WEIGHTS)
+        params.append(limit)
+        with self._lock:
+            rows = self.connection.execute(
+                f"SELECT url, title, source_title, summary, published, "
+                f"snippet(documents_fts, -1, '[', ']', '…', 16) AS snippet, "
+                f"bm25(documents_fts, {weights}) AS rank "
+                f"FROM documents_fts WHERE {' AND '.join(conditions)} ORDER BY rank LIMIT ?", params
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self.connection.execute("SELECT COUNT(*) FROM documents_fts").fetchone()[0]
+
+    def optimize(self):
+        """Merge index segments, worth running after large imports"""
+        with self._lock, self.connection:
+            self.connection.execute("INSERT INTO documents_fts (documents_fts) VALUES ('optimize')")
+
+    def close(self):
+        self.connection.close()
@@ -0,0 +1,87 @@
+import hashlib
+import json
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Optional
+
+from metrics import metrics
+
+
+class SummaryCache:
+    """Persistent cache of generated summaries keyed by document content.
+
+    The key combines the document content hash with the Gemini model name and
+    a hash of the prompt, so changing either of them invalidates old entries.
+    Entries older than `max_age_days` and the least recently used ones above
+    `max_entries` are evicted when the cache is saved.
+    """
+
+    def __init__(self, cache_file: str, model_name: str, prompt: str,
+                 max_entries: int = 500, max_age_days: int = 365):
+        self.cache_file = cache_file
+        self.max_entries = max_entries
+        self.max_age = timedelta(days=max_age_days)
+        prompt_hash = hashlib.sha256((prompt or '').encode('utf-8')).hexdigest()
+        self.namespace = f"{model_name}\0{prompt_hash}"
+        self._lock = threading.Lock()
+        self.entries = self.load()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def content_hash(text: str) -> str:
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+    def _key(self, content_hash: str) -> str:
+        return hashlib.sha256(f"{self.namespace}\0{content_hash}".encode('utf-8')).hexdigest()
+
+    def load(self) -> Dict[str, dict]:
+        """Load cached summaries from disk"""
+        try:
+            if Path(self.cache_file).exists():
+                with open(self.cache_file, 'r', encoding='utf-8') as f:
+                    return json.load(f).get('summaries', {})
+        except Exception as e:
+            print(f"Error loading summary cache: {e}")
+        return {}
+
+    def save(self):
+        """Evict stale entries and write the cache to disk"""
+        try:
+            with self._lock:
+                self._evict()
+                data = {'summaries': self.entries, 'last_updated': datetime.now().isoformat()}
+            with open(self.cache_file, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=1, sort_keys=True)
+        except Exception as e:
+            print(f"Error saving summary cache: {e}")
+
+    def get(self, content_hash: str) -> Optional[str]:
+        """Return the cached summary for a document, if any"""
+        with self._lock:
+            entry = self.entries.get(self._key(content_hash))
+            if entry is None:
+                self.misses += 1
+                metrics.incr('summary_cache.misses')
+                return None
+            self.hits += 1
+            metrics.incr('summary_cache.hits')
+            entry['last_used'] = datetime.now().isoformat()
+            return entry['summary']
+
+    def put(self, content_hash: str, summary: str):
+        now = datetime.now().isoformat()
+        with self._lock:
+            self.entries[self._key(content_hash)] = {
+                'summary': summary,
+                'created': now,
+                'last_used': now
+            }
+
+    def _evict(self):
+        cutoff = (datetime.now() - self.max_age).isoformat()
+        self.entries = {key: entry for key, entry in self.entries.items() if entry['created'] >= cutoff}
+        if len(self.entries) > self.max_entries:
+            newest = sorted(self.entries.items(), key=lambda item: item[1]['last_used'], reverse=True)
+            self.entries = dict(newest[:self.max_entries])
@@ -1,33 +1,159 @@
+import re
+import threading
+from typing import List, Optional, Tuple
+
 from config import AppConfig
-import requests
+from http_client import create_session
+from publisher import RateLimitedError, retry_after_from_response
+from rate_limiter import IntervalLimiter
+
+# Maximum length of one Telegram message
+MESSAGE_LIMIT = 4096
+
+TAG_PATTERN = re.compile(r'<(/?)([a-zA-Z][\w-]*)[^>]*>')
+# Tags and entities that must not be cut in half
+ATOMIC_PATTERN = re.compile(r'<[^>]*>|&#?\w+;')
+# Preferred split points, coarsest first
+SEPARATORS = ('\n\n', '\n', '. ', ' ')
+
+
+def _cut_position(text: str, budget: int) -> int:
+    """Length of the next piece, at the coarsest boundary outside tags in the back half of the budget"""
+    if len(text) <= budget:
+        return len(text)
+    masked = ATOMIC_PATTERN.sub(lambda m: '\0' * len(m.group()), text)
+    for separator in SEPARATORS:
+        cut = masked.rfind(separator, budget // 2, budget - len(separator) + 1)
+        if cut > 0:
+            return cut + len(separator)
+    cut = budget
+    # Step back out of a tag or entity unless it is longer than the whole budget
+    while cut > 0 and masked[cut - 1] == '\0' and masked[cut] == '\0':
+        cut -= 1
+    return cut or budget
+
+
+def _track_tags(piece: str, open_tags: List[Tuple[str, str]]) -> Tuple[str, List[Tuple[str, str]]]:
+    """Return the piece without closing tags that close nothing, and the tags open after it"""
+    open_tags = list(open_tags)
+
+    def track(match):
+        name = match.group(2).lower()
+        if not match.group(1):
+            open_tags.append((name, match.group(0)))
+            return match.group(0)
+        for index in range(len(open_tags) - 1, -1, -1):
+            if open_tags[index][0] == name:
+                del open_tags[index]
+                return match.group(0)
+        return ''
+
+    return TAG_PATTERN.sub(track, piece), open_tags
+
+
+def _closing_tags(open_tags: List[Tuple[str, str]]) -> str:
+    return "".join(f"</{name}>" for name, _ in reversed(open_tags))
+
+
+def split_html_message(message: str, limit: int = MESSAGE_LIMIT) -> List[str]:
+    """Split an HTML message into parts within the Telegram limit.
+
+    Tags left open at the end of a part are closed there and reopened at the
+    start of the next part, so every part is valid HTML on its own. Room for
+    those tags is measured per part. Tags too long to fit a part with their
+    text are dropped, keeping only the text they enclose.
+    """
+    if len(message) <= limit:
+        return [message]
+    message = TAG_PATTERN.sub(lambda m: '' if len(m.group()) > limit // 4 else m.group(), message)
+    parts = []
+    open_tags = []
+    text = message
+    while text:
+        prefix = "".join(tag for _, tag in open_tags)
+        budget = limit - len(prefix) - len(_closing_tags(open_tags))
+        while True:
+            cut = _cut_position(text, budget)
+            piece, piece_open = _track_tags(text[:cut], open_tags)
+            part = prefix + piece + _closing_tags(piece_open)
+            # Tags opened inside the piece need room to be closed as well
+            if len(part) <= limit or budget <= 1:
+                break
+            budget -= len(part) - limit
+        text = text[cut:]
+        open_tags = piece_open
+        part = part.strip()
+        if part:
+            parts.append(part)
+    return parts
+
 
 class TelegramNotifier:
-    def __init__(self):
-        config = AppConfig()
+    """Sends document summaries to a Telegram chat over a pooled session.
+
+    Messages above the length limit are split into parts sent in order, and
+    messages to one chat are spaced `telegram_min_interval` seconds apart to
+    stay under Telegram's per-chat limits.
+    """
+
+    def __init__(self, config: Optional[AppConfig] = None):
+        config = config or AppConfig()
         self.telegram_token = config.telegram_token
         self.telegram_chat_id = config.telegram_chat_id
+        self.telegram_api_url = config.telegram_api_url
+        self.min_interval = config.telegram_min_interval
+        self.session = create_session(pool_size=2)
+        self._lock = threading.Lock()
+        self._chat_limiters = {}
+        # Parts already delivered per message, so a retry resumes instead of repeating them
+        self._sent_parts = {}
 
     def send_messages_to_telegram(self, all_new_pdfs):
         for pdf_info in all_new_pdfs:
-            message = f"""
+            try:
+                self.send_pdf_message(pdf_info)
+            except Exception as e:
+                print(f"Error sending Telegram message: {e}")
+
+    def format_message(self, pdf_info) -> str:
+        return f"""
                 <b>Název:</b> {pdf_info['source_title']}
                 <b>PDF:</b> <a href=\"{pdf_info['url']}\">Stáhnout dokument</a>
                 <b>Souhrn:</b>
                 {pdf_info['summary']}
             """.strip()
-            self.send_telegram_message(message)
+
+    def send_pdf_message(self, pdf_info):
+        """Send summary of one PDF, raises on failure"""
+        self.send_long_message(self.format_message(pdf_info), key=pdf_info['url'])
+
+    def send_long_message(self, message: str, key: str = None):
+        """Send a message split into parts, a retry with the same key skips parts already sent"""
+        parts = split_html_message(message)
+        key = key or message
+        for index in range(self._sent_parts.get(key, 0), len(parts)):
+            self.send_telegram_message(parts[index])
+            self._sent_parts[key] = index + 1
+        self._sent_parts.pop(key, None)
+
+    def _limiter(self, chat_id: str) -> IntervalLimiter:
+        with self._lock:
+            if chat_id not in self._chat_limiters:
+                self._chat_limiters[chat_id] = IntervalLimiter(self.min_interval)
+            return self._chat_limiters[chat_id]
 
     def send_telegram_message(self, message: str):
         """Send message to Telegram chat"""
-        try:
-            url = f"https://api.telegram.org/bot{self.telegram_token}/sendMessage"
-            data = {
-                'chat_id': self.telegram_chat_id,
-                'text': message,
-                'parse_mode': 'HTML'
-            }
-            response = requests.post(url, data=data, timeout=30)
-            response.raise_for_status()
-            print("Message sent to Telegram successfully")
-        except Exception as e:
-            print(f"Error sending Telegram message: {e}")
\ No newline at end of file
+        url = f"{self.telegram_api_url}/bot{self.telegram_token}/sendMessage"
+        data = {
+            'chat_id': self.telegram_chat_id,
+            'text': message,
+            'parse_mode': 'HTML'
+        }
+        self._limiter(self.telegram_chat_id).wait()
+        response = self.session.post(url, data=data, timeout=30)
+        retry_after = retry_after_from_response(response, default=5)
+        if retry_after is not None:
+            raise RateLimitedError("Telegram rate limit exceeded", retry_after)
+        response.raise_for_status()
+        print("Message sent to Telegram successfully")
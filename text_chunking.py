@@ -0,0 +1,52 @@
+import re
+from typing import List
+
+# Separator placed between pages of extracted PDF text
+PAGE_SEPARATOR = "\f"
+
+# Start of a new resolution or agenda item in council documents
+RESOLUTION_BOUNDARY = re.compile(
+    r'\n(?=\s*(?:Usnesení\s+č\.|[A-Z]{2}\s?\d{2}\s\d{2}\s\d{2}|\d{1,3}\.\s+[A-ZÁČĎÉĚÍŇÓŘŠŤÚŮÝŽ]))'
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count of a text, about four characters per token"""
+    return len(text) // 4 + 1
+
+
+def split_into_chunks(text: str, max_tokens: int) -> List[str]:
+    """Split text into chunks of at most max_tokens estimated tokens.
+
+    Splits prefer page boundaries, then resolution boundaries, then lines,
+    and consecutive pieces are packed together while they fit.
+    """
+    pieces = []
+    for page in text.split(PAGE_SEPARATOR):
+        pieces.extend(_split_piece(page, max_tokens))
+
+    chunks = []
+    current = []
+    current_tokens = 0
+    for piece in pieces:
+        piece_tokens = estimate_tokens(piece)
+        if current and current_tokens + piece_tokens > max_tokens:
+            chunks.append("\n".join(current))
+            current, current_tokens = [], 0
+        current.append(piece)
+        current_tokens += piece_tokens
+    if current:
+        chunks.append("\n".join(current))
+    return [chunk for chunk in chunks if chunk.strip()]
+
+
+def _split_piece(piece: str, max_tokens: int) -> List[str]:
+    if estimate_tokens(piece) <= max_tokens:
+        return [piece]
+    for pattern in (RESOLUTION_BOUNDARY, re.compile(r'\n')):
+        parts = pattern.split(piece)
+        if len(parts) > 1:
+            return [sub for part in parts for sub in _split_piece(part, max_tokens)]
+    # A single huge line, cut it by characters
+    size = max_tokens * 4
+    return [piece[i:i + size] for i in range(0, len(piece), size)]